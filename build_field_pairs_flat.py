@@ -23,6 +23,8 @@ import pandas as pd
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from sheets_batch import SheetsBatchWriter, SpreadsheetMetadataCache
+
 # ========= CONFIG – EDIT THESE =========
 
 SERVICE_ACCOUNT_FILE = "service_account.json"
@@ -45,39 +47,6 @@ def get_sheets_service():
     return build("sheets", "v4", credentials=creds)
 
 
-def get_spreadsheet_metadata(service):
-    spreadsheet = service.spreadsheets().get(
-        spreadsheetId=SPREADSHEET_ID
-    ).execute()
-    sheets = spreadsheet.get("sheets", [])
-    by_title = {
-        s["properties"]["title"]: s["properties"]
-        for s in sheets
-    }
-    return by_title
-
-
-def ensure_sheet(service, title: str) -> int:
-    meta = get_spreadsheet_metadata(service)
-    if title in meta:
-        return meta[title]["sheetId"]
-
-    body = {
-        "requests": [
-            {
-                "addSheet": {
-                    "properties": {"title": title}
-                }
-            }
-        ]
-    }
-    resp = service.spreadsheets().batchUpdate(
-        spreadsheetId=SPREADSHEET_ID,
-        body=body
-    ).execute()
-    return resp["replies"][0]["addSheet"]["properties"]["sheetId"]
-
-
 def main():
     # --- Load matched CSV ---
     mapped_path = Path(MAPPED_CSV)
@@ -157,22 +126,16 @@ def main():
 
     # --- Write to Sheets ---
     service = get_sheets_service()
-    ensure_sheet(service, OUTPUT_SHEET_NAME)
+    SpreadsheetMetadataCache(service, SPREADSHEET_ID).ensure_sheet(OUTPUT_SHEET_NAME)
 
-    # Clear sheet
-    service.spreadsheets().values().clear(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{OUTPUT_SHEET_NAME}'!A:Z"
-    ).execute()
+    # Clear sheet + write (one batchClear, one batchUpdate)
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+    writer.clear(f"'{OUTPUT_SHEET_NAME}'!A:Z")
 
     values = [df_flat.columns.tolist()] + df_flat.fillna("").values.tolist()
 
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{OUTPUT_SHEET_NAME}'!A1",
-        valueInputOption="RAW",
-        body={"values": values}
-    ).execute()
+    writer.write(f"'{OUTPUT_SHEET_NAME}'!A1", values)
+    writer.flush()
 
     print(f"✓ Wrote FieldPairs sheet with {len(df_flat)} rows.")
 
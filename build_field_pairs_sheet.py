@@ -26,7 +26,6 @@ Output:
   - New sheet (tab) in the same Google Sheet, e.g. "FieldPairs"
 """
 
-from collections import OrderedDict, defaultdict
 from pathlib import Path
 import sys
 
@@ -34,6 +33,9 @@ import pandas as pd
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from column_layout import grouped_column_grid, interleave_columns
+from sheets_batch import SheetsBatchWriter, SpreadsheetMetadataCache
+
 # ==========================
 # CONFIG - EDIT THIS PART
 # ==========================
@@ -66,46 +68,6 @@ def get_sheets_service():
     return build("sheets", "v4", credentials=creds)
 
 
-def get_spreadsheet_metadata(service):
-    spreadsheet = service.spreadsheets().get(
-        spreadsheetId=SPREADSHEET_ID
-    ).execute()
-    sheets = spreadsheet.get("sheets", [])
-    by_title = {
-        s["properties"]["title"]: s["properties"]
-        for s in sheets
-    }
-    return by_title
-
-
-def ensure_sheet(service, title: str) -> int:
-    """
-    Ensure a sheet with the given title exists.
-    Returns its sheetId.
-    """
-    meta = get_spreadsheet_metadata(service)
-    if title in meta:
-        return meta[title]["sheetId"]
-
-    body = {
-        "requests": [
-            {
-                "addSheet": {
-                    "properties": {
-                        "title": title
-                    }
-                }
-            }
-        ]
-    }
-    resp = service.spreadsheets().batchUpdate(
-        spreadsheetId=SPREADSHEET_ID,
-        body=body
-    ).execute()
-    sheet_id = resp["replies"][0]["addSheet"]["properties"]["sheetId"]
-    return sheet_id
-
-
 # ==========================
 # MAIN
 # ==========================
@@ -140,29 +102,25 @@ def main():
 
     # ------------------------------
     # Build mapping for Ocotillo_TableField
-    # mapping[(table, old_field)] -> list of "<Ocotillo Table Name>, <Ocotillo Field Name>"
+    # mapping[(table, old_field)] -> "<Ocotillo Table Name>, <Ocotillo Field Name>"
+    # (several mappings for the same field are joined with " | ")
     # ------------------------------
-    mapping = defaultdict(list)
-
-    for _, row in df_m.iterrows():
-        table = str(row["Old Table Name"]).strip()
-        old_field = str(row["Old Column Name"]).strip()
-        o_tab = "" if pd.isna(row["Ocotillo Table Name"]) else str(row["Ocotillo Table Name"]).strip()
-        o_field = "" if pd.isna(row["Ocotillo Field Name"]) else str(row["Ocotillo Field Name"]).strip()
-
-        # If both Ocotillo fields are empty, we could skip; but let's still show the table name if present.
-        if not o_tab and not o_field:
-            formatted = ""
-        elif o_tab and o_field:
-            formatted = f"{o_tab}, {o_field}"
-        elif o_tab:
-            formatted = f"{o_tab}, "
-        else:
-            formatted = f", {o_field}"
-
-        # Only add non-empty formatted strings
-        if formatted:
-            mapping[(table, old_field)].append(formatted)
+    o_tab = df_m["Ocotillo Table Name"].fillna("").astype(str).str.strip()
+    o_field = df_m["Ocotillo Field Name"].fillna("").astype(str).str.strip()
+    formatted = o_tab + ", " + o_field
+    # Only keep non-empty formatted strings
+    has_target = (o_tab != "") | (o_field != "")
+
+    mapping = (
+        pd.DataFrame({
+            "table": df_m["Old Table Name"].astype(str).str.strip(),
+            "field": df_m["Old Column Name"].astype(str).str.strip(),
+            "formatted": formatted,
+        })[has_target]
+        .groupby(["table", "field"], sort=False)["formatted"]
+        .agg(" | ".join)
+        .to_dict()
+    )
 
     # ------------------------------
     # Collect ordered list of tables (alphabetical)
@@ -173,36 +131,23 @@ def main():
     ))
 
     # ------------------------------
-    # Build mapping: table -> ordered list of old fields
+    # Old fields per table: matched first, then unmatched, original order,
+    # de-duplicated within each table
     # ------------------------------
-    table_fields = OrderedDict()
-    max_len = 0
+    fields = pd.DataFrame({
+        "table": pd.concat([df_m["Old Table Name"], df_u["Old Table Name"]], ignore_index=True),
+        "field": pd.concat([df_m["Old Column Name"], df_u["Old Column Name"]], ignore_index=True)
+                   .astype(str).str.strip(),
+    }).dropna(subset=["table"]).drop_duplicates()
 
-    for table in tables:
-        fields = []
-
-        # Matched first (preserve original order)
-        g_m = df_m[df_m["Old Table Name"] == table]
-        for _, r in g_m.iterrows():
-            fields.append(str(r["Old Column Name"]).strip())
-
-        # Then unmatched (also preserve order)
-        if not df_u.empty:
-            g_u = df_u[df_u["Old Table Name"] == table]
-            for _, r in g_u.iterrows():
-                fields.append(str(r["Old Column Name"]).strip())
-
-        # De-duplicate while preserving order
-        seen = set()
-        deduped = []
-        for f in fields:
-            if f not in seen:
-                seen.add(f)
-                deduped.append(f)
-
-        table_fields[table] = deduped
-        if len(deduped) > max_len:
-            max_len = len(deduped)
+    ocotillo = [
+        mapping.get((str(t).strip(), f), "")
+        for t, f in zip(fields["table"], fields["field"])
+    ]
+
+    field_grid = grouped_column_grid(fields["table"], fields["field"], tables)
+    ocotillo_grid = grouped_column_grid(fields["table"], ocotillo, tables)
+    max_len = field_grid.shape[0]
 
     # ------------------------------
     # Build 2D values array for Sheets
@@ -213,53 +158,25 @@ def main():
     header_row = []
     subheader_row = []
 
-    for table in table_fields.keys():
+    for table in tables:
         header_row.extend([table, ""])  # table over two columns
         subheader_row.extend(["NMAquifer_Field", "Ocotillo_TableField"])
 
     values = [header_row, subheader_row]
-
-    # Data rows
-    for i in range(max_len):
-        row = []
-        for table, fields in table_fields.items():
-            # NMAquifer_Field
-            if i < len(fields):
-                field_name = fields[i]
-                row.append(field_name)
-                # Ocotillo_TableField: lookup mapping
-                key = (table, field_name)
-                ocotillo_values = mapping.get(key, [])
-                if ocotillo_values:
-                    # If multiple mappings exist, join them with " | "
-                    row.append(" | ".join(ocotillo_values))
-                else:
-                    row.append("")
-            else:
-                # No field at this row for this table
-                row.append("")
-                row.append("")
-        values.append(row)
+    values.extend(interleave_columns(field_grid, ocotillo_grid).tolist())
 
     # ------------------------------
     # Write to Sheets
     # ------------------------------
     service = get_sheets_service()
-    sheet_id = ensure_sheet(service, OUTPUT_SHEET_NAME)
-
-    # Clear existing content
-    service.spreadsheets().values().clear(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{OUTPUT_SHEET_NAME}'!A:Z"
-    ).execute()
-
-    # Write new content starting at A1
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{OUTPUT_SHEET_NAME}'!A1",
-        valueInputOption="RAW",
-        body={"values": values}
-    ).execute()
+    sheet_id = SpreadsheetMetadataCache(service, SPREADSHEET_ID).ensure_sheet(OUTPUT_SHEET_NAME)
+
+    # Clear existing content, then write new content starting at A1
+    # (one batchClear + one batchUpdate)
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+    writer.clear(f"'{OUTPUT_SHEET_NAME}'!A:Z")
+    writer.write(f"'{OUTPUT_SHEET_NAME}'!A1", values)
+    writer.flush()
 
     print(f"✓ Wrote {OUTPUT_SHEET_NAME} with {len(tables)} tables and {max_len} rows of fields.")
 
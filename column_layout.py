@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Column-per-group layouts for Sheets (Matrix tab, FieldPairs tab).
+
+Given one cell per row plus the group (table) it belongs to, build a padded
+2D grid with one column per group, in a given group order:
+
+  - groups once (categorical codes + groupby/cumcount), no per-group scans
+  - cells keep their input order inside each group
+  - padding is a NumPy object array pre-filled with ""
+
+Usage:
+  grid = grouped_column_grid(tables, cells, ordered_tables)  # rows x groups
+  df = grouped_column_frame(tables, cells, ordered_tables)  # same, as DataFrame
+  both = interleave_columns(grid_a, grid_b)                  # a0 b0 a1 b1 ...
+"""
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def grouped_column_grid(keys: Sequence, values: Sequence, order: Sequence, fill: str = "") -> np.ndarray:
+    """
+    Object grid (max group size x len(order)); column j holds the values whose
+    key == order[j], in input order. Keys not in order are dropped.
+    """
+    order = list(order)
+    codes = pd.Categorical(pd.Series(keys, dtype=object), categories=order).codes
+    values = np.asarray(pd.Series(values, dtype=object), dtype=object)
+    keep = codes >= 0
+    codes, values = codes[keep], values[keep]
+
+    pos = pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy()
+    n_rows = int(pos.max()) + 1 if len(pos) else 0
+
+    grid = np.full((n_rows, len(order)), fill, dtype=object)
+    grid[pos, codes] = values
+    return grid
+
+
+def grouped_column_frame(keys: Sequence, values: Sequence, order: Sequence, fill: str = "") -> pd.DataFrame:
+    """grouped_column_grid as a DataFrame with one column per group."""
+    return pd.DataFrame(grouped_column_grid(keys, values, order, fill), columns=list(order), dtype=object)
+
+
+def interleave_columns(*grids: np.ndarray) -> np.ndarray:
+    """Interleave same-shaped grids column by column: a0 b0 a1 b1 ..."""
+    rows, cols = grids[0].shape
+    out = np.empty((rows, cols * len(grids)), dtype=object)
+    for k, g in enumerate(grids):
+        out[:, k::len(grids)] = g
+    return out
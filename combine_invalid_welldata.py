@@ -1,7 +1,29 @@
 #!/usr/bin/env python3
+"""
+Merge the InvalidWellData*.csv exports into one CSV (and optionally Parquet).
+
+- Header reconciliation: the output header is the union of all input
+  headers (columns in order of first appearance); a file missing a column
+  gets "" for it.
+- Each input is parsed in a worker process and streamed, in CHUNK_ROWS
+  batches through large buffers, into a part file remapped to the union
+  header. The parts are then concatenated in sorted input order, so the
+  output is the same whatever the number of workers.
+- With --parquet (needs pyarrow) a Parquet copy (all string columns) is
+  written next to the CSV.
+
+Usage:
+  python combine_invalid_welldata.py [--workers N] [--parquet]
+"""
+import argparse
 import csv
 import glob
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
 
 # Pattern for your input files (in the current directory)
 INPUT_PATTERN = "InvalidWellData*.csv"
@@ -9,8 +31,104 @@ INPUT_PATTERN = "InvalidWellData*.csv"
 # Name of the combined output file
 OUTPUT_FILE = "InvalidWellData_combined.csv"
 
-def main():
-    files = sorted(glob.glob(INPUT_PATTERN))
+# Optional Parquet copy of the combined output (--parquet)
+PARQUET_FILE = "InvalidWellData_combined.parquet"
+
+# Parallel parse workers (processes)
+WORKERS = min(4, os.cpu_count() or 1)
+
+BUFFER_SIZE = 1 << 20  # 1 MB read/write buffers
+CHUNK_ROWS = 10_000
+
+
+def read_header(path):
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), None) or []
+
+
+def union_header(headers):
+    """Columns of all headers, in order of first appearance."""
+    out, seen = [], set()
+    for header in headers:
+        for col in header:
+            if col not in seen:
+                seen.add(col)
+                out.append(col)
+    return out
+
+
+def write_part(file_path, header, part_path):
+    """
+    Stream one input file into part_path with its rows laid out in `header`
+    order. Returns (data rows written, rows that had extra cells dropped).
+    """
+    rows_written = 0
+    dropped = 0
+    with open(file_path, "r", newline="", encoding="utf-8-sig", buffering=BUFFER_SIZE) as in_f, \
+         open(part_path, "w", newline="", encoding="utf-8", buffering=BUFFER_SIZE) as out_f:
+        reader = csv.reader(in_f)
+        writer = csv.writer(out_f)
+        file_header = next(reader, None) or []
+
+        if file_header == header:
+            # same layout: rows are written unchanged, except surplus cells
+            # are dropped (and counted) as in the remap path below
+            width = len(header)
+            while True:
+                chunk = list(islice(reader, CHUNK_ROWS))
+                if not chunk:
+                    break
+                for i, row in enumerate(chunk):
+                    if len(row) > width:
+                        chunk[i] = row[:width]
+                        dropped += 1
+                writer.writerows(chunk)
+                rows_written += len(chunk)
+            return rows_written, dropped
+
+        pos = {}
+        for i, col in enumerate(file_header):
+            pos.setdefault(col, i)
+        src = [pos.get(col) for col in header]
+        width = len(file_header)
+
+        while True:
+            chunk = list(islice(reader, CHUNK_ROWS))
+            if not chunk:
+                break
+            out_rows = []
+            for row in chunk:
+                if len(row) > width:
+                    dropped += 1
+                out_rows.append([row[i] if i is not None and i < len(row) else "" for i in src])
+            writer.writerows(out_rows)
+            rows_written += len(out_rows)
+    return rows_written, dropped
+
+
+def write_parquet(csv_path, header, parquet_path):
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow is not installed; skipped the Parquet output.")
+        return
+    table = pacsv.read_csv(
+        csv_path,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: pa.string() for c in header},
+            strings_can_be_null=False,
+        ),
+    )
+    pq.write_table(table, parquet_path)
+    print(f"Wrote {table.num_rows} rows to {str(parquet_path)!r}.")
+
+
+def main(workers=WORKERS, parquet=False):
+    output = Path(OUTPUT_FILE)
+    files = sorted(f for f in glob.glob(INPUT_PATTERN) if Path(f).resolve() != output.resolve())
     if not files:
         print(f"No files matching pattern {INPUT_PATTERN!r} found.")
         return
@@ -19,29 +137,44 @@ def main():
     for f in files:
         print(f"  - {f}")
 
-    writer = None
-    total_rows = 0
+    headers = [read_header(f) for f in files]
+    header = union_header(headers)
+    for f, h in zip(files, headers):
+        missing = [c for c in header if c not in h]
+        if h and missing:
+            print(f"  {f}: missing {len(missing)} column(s), filled with '': {missing}")
 
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as out_f:
-        for i, file_path in enumerate(files, start=1):
-            with open(file_path, "r", newline="", encoding="utf-8") as in_f:
-                reader = csv.reader(in_f)
-                header = next(reader, None)
+    part_dir = Path(tempfile.mkdtemp(prefix="combine_parts_", dir=output.resolve().parent))
+    parts = [part_dir / f"{i:05d}.csv" for i in range(len(files))]
+    try:
+        if workers > 1 and len(files) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                results = list(ex.map(write_part, files, [header] * len(files), parts))
+        else:
+            results = [write_part(f, header, p) for f, p in zip(files, parts)]
 
-                # Initialize writer with header from the first file
-                if writer is None:
-                    writer = csv.writer(out_f)
-                    if header:
-                        writer.writerow(header)
+        total_rows = 0
+        with open(output, "w", newline="", encoding="utf-8") as out_f:
+            if header:
+                csv.writer(out_f).writerow(header)
+            for file_path, part, (rows, dropped) in zip(files, parts, results):
+                with open(part, "r", newline="", encoding="utf-8") as part_f:
+                    shutil.copyfileobj(part_f, out_f, BUFFER_SIZE)
+                total_rows += rows
+                note = f" ({dropped} row(s) had cells beyond the header, dropped)" if dropped else ""
+                print(f"Finished {file_path}: {rows} rows{note}")
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
 
-                # Write all remaining rows
-                for row in reader:
-                    writer.writerow(row)
-                    total_rows += 1
+    print(f"\nDone. Wrote {total_rows} data rows to {OUTPUT_FILE!r}.")
 
-            print(f"Finished {file_path}")
+    if parquet:
+        write_parquet(output, header, Path(PARQUET_FILE))
 
-    print(f"\nDone. Wrote {total_rows} data rows to {OUTPUT_FILE!r}.")
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="Combine InvalidWellData*.csv exports.")
+    ap.add_argument("--workers", type=int, default=WORKERS, help=f"Parse processes (default {WORKERS})")
+    ap.add_argument("--parquet", action="store_true", help=f"Also write {PARQUET_FILE} (needs pyarrow)")
+    args = ap.parse_args()
+    main(args.workers, args.parquet)
@@ -1,5 +1,12 @@
+import argparse
+import bisect
+import fnmatch
+import hashlib
+import json
 import os
-import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 
 from reportlab.lib.pagesizes import letter
@@ -10,16 +17,35 @@ from reportlab.platypus import (
     Table,
     TableStyle,
     Image,
+    PageBreak,
+    Flowable,
 )
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
+try:
+    from PIL import Image as PILImage
+except ImportError:  # without Pillow the original photos are embedded
+    PILImage = None
+
 
 # === CONFIG ===
 CSV_PATH = r"monica_gw_request_20251118.csv"  # adjust if needed
 PHOTOS_DIR = r"\\agustin\amp\data\database\photos\Digital photos_wells"
 OUTPUT_DIR = r"output_pdfs"        # folder where individual PDFs are written
+COMBINED_NAME = "pointids"         # --combined: pointids.pdf, or pointids_0001.pdf, ... with --batch-size
+WORKERS = 1                        # >1: build PDFs in a pool of worker processes
+CHUNK_SIZE = 8                     # PointIDs handed to a worker per task
+SLOWEST_TO_PRINT = 5
+PHOTO_INDEX_CACHE = r".photo_index.json"  # local copy of the PHOTOS_DIR listing
+THUMBNAIL_DIR = r".photo_thumbnails"       # local cache of downscaled photos
+THUMBNAIL_DPI = 150                        # resolution of embedded photos at their printed size
+THUMBNAIL_QUALITY = 85                     # JPEG quality of the thumbnails
+
+# Largest printed photo size (the photo is shrunk to fit this box)
+PHOTO_MAX_WIDTH = 6.5 * inch
+PHOTO_MAX_HEIGHT = 8.0 * inch
 
 
 def make_output_dir(path: str):
@@ -27,25 +53,98 @@ def make_output_dir(path: str):
         os.makedirs(path)
 
 
-def aggregate_group_to_record(group: pd.DataFrame) -> dict:
+# melt column names; can't collide with a column of the request CSV
+_FIELD = "__field__"
+_VALUE = "__value__"
+
+
+def aggregate_records(df: pd.DataFrame) -> dict:
+    """
+    {PointID: record} for every PointID in one vectorized pass: each column is
+    collapsed to its unique non-empty values (as strings, in order of first
+    appearance) joined with '; '. Columns with no values are left out.
     """
-    For a group of rows with the same PointID, collapse each column into a
-    single string (join unique non-null values with '; ').
+    # object dtype keeps each column's own values (melting all-int columns
+    # together would otherwise upcast them, e.g. 1 -> "1.0")
+    df = df[df["PointID"].notna()].astype(object)
+    long = df.melt(id_vars="PointID", var_name=_FIELD, value_name=_VALUE).dropna(subset=[_VALUE])
+    long["PointID"] = long["PointID"].astype(str)
+    long[_VALUE] = long[_VALUE].astype(str)
+    long = long[long[_VALUE].str.strip() != ""].drop_duplicates()
+    # melt is column-major, so each record's fields come out in CSV column order
+    joined = long.groupby(["PointID", _FIELD], sort=False)[_VALUE].agg("; ".join)
+
+    records = {str(pid): {} for pid in df["PointID"].unique()}
+    for (point_id, field), value in joined.items():
+        records[point_id][field] = value
+    return records
+
+
+class PhotoIndex:
+    """
+    One listing of PHOTOS_DIR, so photo lookups don't list the network share
+    once per PointID. The listing is cached in PHOTO_INDEX_CACHE and reused
+    while the directory's mtime is unchanged.
+
+    Matching is the same as glob '<PointID without hyphens>*.jpg' (prefix
+    match; case-insensitive where the OS is).
     """
-    record = {}
-    for col in group.columns:
-        if col == "PointID":
-            continue
-        # Unique non-empty values
-        vals = [
-            str(v)
-            for v in group[col].dropna().unique()
-            if str(v).strip() != ""
-        ]
-        if not vals:
-            continue
-        record[col] = "; ".join(vals)
-    return record
+
+    def __init__(self, photos_dir: str, names: list):
+        self.photos_dir = photos_dir
+        pairs = sorted((os.path.normcase(n), n) for n in names)
+        self._keys = [k for k, _ in pairs]
+        self._names = [n for _, n in pairs]
+
+    @classmethod
+    def load(cls, photos_dir: str = None, cache_path: str = None) -> "PhotoIndex":
+        photos_dir = photos_dir or PHOTOS_DIR
+        cache_path = cache_path or PHOTO_INDEX_CACHE
+        try:
+            mtime = os.stat(photos_dir).st_mtime
+        except OSError:
+            return cls(photos_dir, [])
+
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("dir") == photos_dir and cached.get("mtime") == mtime:
+                return cls(photos_dir, cached["names"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        with os.scandir(photos_dir) as it:
+            names = [e.name for e in it if fnmatch.fnmatch(e.name, "*.jpg")]
+        try:
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"dir": photos_dir, "mtime": mtime, "names": names}, f)
+        except OSError:
+            pass  # the cache is only an optimization
+        return cls(photos_dir, names)
+
+    def photos_for(self, point_id: str) -> list:
+        """Sorted photo paths whose file name starts with the hyphen-stripped PointID."""
+        prefix = os.path.normcase(point_id.replace("-", ""))
+        i = bisect.bisect_left(self._keys, prefix)
+        names = []
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            names.append(self._names[i])
+            i += 1
+        return sorted(os.path.join(self.photos_dir, n) for n in names)
+
+    def prefix_map(self, point_ids) -> dict:
+        """{hyphen-stripped PointID: sorted photo paths} for the given PointIDs."""
+        return {pid.replace("-", ""): self.photos_for(pid) for pid in point_ids}
+
+
+_photo_index = None
+
+
+def get_photo_index() -> PhotoIndex:
+    global _photo_index
+    if _photo_index is None:
+        _photo_index = PhotoIndex.load()
+    return _photo_index
 
 
 def find_photos_for_point(point_id: str) -> list:
@@ -54,9 +153,42 @@ def find_photos_for_point(point_id: str) -> list:
     PointID in CSV has hyphens (e.g. 'WL-0224'), but photos are
     stored without hyphens (e.g. 'WL0224*.jpg').
     """
-    clean_id = point_id.replace("-", "")
-    pattern = os.path.join(PHOTOS_DIR, f"{clean_id}*.jpg")
-    return sorted(glob.glob(pattern))
+    return get_photo_index().photos_for(point_id)
+
+
+def thumbnail_for(photo_path: str) -> str:
+    """
+    Path of a copy of the photo downscaled to the printed size at THUMBNAIL_DPI,
+    cached in THUMBNAIL_DIR by source path + mtime + size. Photos that are
+    already small enough (or can't be read / no Pillow) are used as they are.
+    """
+    if PILImage is None:
+        return photo_path
+    try:
+        st = os.stat(photo_path)
+        key = f"{os.path.abspath(photo_path)}|{st.st_mtime}|{st.st_size}|{THUMBNAIL_DPI}|{THUMBNAIL_QUALITY}"
+        thumb_path = os.path.join(THUMBNAIL_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        max_px = (
+            int(PHOTO_MAX_WIDTH / inch * THUMBNAIL_DPI),
+            int(PHOTO_MAX_HEIGHT / inch * THUMBNAIL_DPI),
+        )
+        with PILImage.open(photo_path) as im:
+            if im.width <= max_px[0] and im.height <= max_px[1]:
+                return photo_path
+            im.draft("RGB", max_px)  # let the JPEG decoder downscale while decoding
+            small = im.convert("RGB")
+            small.thumbnail(max_px, PILImage.LANCZOS)
+
+        make_output_dir(THUMBNAIL_DIR)
+        tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+        small.save(tmp_path, "JPEG", quality=THUMBNAIL_QUALITY, dpi=(THUMBNAIL_DPI, THUMBNAIL_DPI))
+        os.replace(tmp_path, thumb_path)  # atomic: safe with parallel workers
+        return thumb_path
+    except Exception:
+        return photo_path
 
 
 from reportlab.lib.styles import ParagraphStyle
@@ -64,37 +196,60 @@ from reportlab.platypus import Paragraph, Table, TableStyle, Image, Spacer
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
-def build_pdf_for_point(point_id: str, group: pd.DataFrame, output_dir: str):
+_styles = None
+
+
+def shared_styles() -> dict:
     """
-    Create a single PDF for one PointID, including:
+    Paragraph and table styles, built once per process and shared by every
+    point (and every point of a combined PDF).
+    """
+    global _styles
+    if _styles is None:
+        sheet = getSampleStyleSheet()
+        _styles = {
+            "Title": sheet["Title"],
+            "Heading2": sheet["Heading2"],
+            "Normal": sheet["Normal"],
+            "Italic": sheet["Italic"],
+            # Paragraph style for table cells (wrap long text)
+            "Cell": ParagraphStyle(
+                "Cell",
+                parent=sheet["Normal"],
+                fontSize=8,
+                leading=9,
+                wordWrap="CJK",   # better at wrapping long strings / URLs
+            ),
+            "Table": TableStyle(
+                [
+                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                    ("FONTSIZE", (0, 0), (-1, 0), 9),
+                    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+                    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+                ]
+            ),
+        }
+    return _styles
+
+
+def point_elements(point_id: str, record: dict, photo_files: list = None) -> list:
+    """
+    Flowables for one PointID:
       - Header with PointID
-      - Table of field/value pairs (wrapped text)
-      - All matching photos
+      - Table of field/value pairs from its record (wrapped text)
+      - All matching photos (photo_files, looked up if not given)
     """
-    # Sanitize filename (in case of weird chars)
-    safe_point_id = point_id.replace("/", "_").replace("\\", "_")
-    pdf_path = os.path.join(output_dir, f"{safe_point_id}.pdf")
-
-    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-    styles = getSampleStyleSheet()
+    styles = shared_styles()
+    cell_style = styles["Cell"]
     elements = []
 
     # Title
     elements.append(Paragraph(f"Point ID: {point_id}", styles["Title"]))
     elements.append(Spacer(1, 12))
 
-    # Aggregate field values
-    record = aggregate_group_to_record(group)
-
-    # Paragraph style for table cells (wrap long text)
-    cell_style = ParagraphStyle(
-        "Cell",
-        parent=styles["Normal"],
-        fontSize=8,
-        leading=9,
-        wordWrap="CJK",   # better at wrapping long strings / URLs
-    )
-
     # Build table: Field | Value
     data = [["Field", "Value"]]  # header row
 
@@ -105,34 +260,23 @@ def build_pdf_for_point(point_id: str, group: pd.DataFrame, output_dir: str):
         data.append([field_paragraph, value_paragraph])
 
     table = Table(data, colWidths=[2.0 * inch, 4.5 * inch])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 9),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-            ]
-        )
-    )
+    table.setStyle(styles["Table"])
 
     elements.append(table)
     elements.append(Spacer(1, 18))
 
     # Photos
-    photo_files = find_photos_for_point(point_id)
+    if photo_files is None:
+        photo_files = find_photos_for_point(point_id)
     if photo_files:
         elements.append(Paragraph("Photos", styles["Heading2"]))
         elements.append(Spacer(1, 6))
 
         for photo_path in photo_files:
             try:
-                img = Image(photo_path)
+                img = Image(thumbnail_for(photo_path))
                 # Restrict size to fit page width
-                img._restrictSize(6.5 * inch, 8.0 * inch)
+                img._restrictSize(PHOTO_MAX_WIDTH, PHOTO_MAX_HEIGHT)
                 elements.append(img)
                 elements.append(
                     Paragraph(os.path.basename(photo_path), styles["Normal"])
@@ -152,12 +296,150 @@ def build_pdf_for_point(point_id: str, group: pd.DataFrame, output_dir: str):
             Paragraph("No photos found for this PointID.", styles["Italic"])
         )
 
-    doc.build(elements)
-    print(f"Created PDF for {point_id}: {pdf_path}")
+    return elements
+
+
+def build_pdf_for_point(point_id: str, record: dict, output_dir: str,
+                        photo_files: list = None) -> str:
+    """Create a single PDF for one PointID (see point_elements). Returns the PDF path."""
+    # Sanitize filename (in case of weird chars)
+    safe_point_id = point_id.replace("/", "_").replace("\\", "_")
+    pdf_path = os.path.join(output_dir, f"{safe_point_id}.pdf")
+
+    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
+    doc.build(point_elements(point_id, record, photo_files))
+    return pdf_path
+
+
+class PointBookmark(Flowable):
+    """Zero-size flowable: bookmark + top-level outline entry where a PointID starts."""
+
+    def __init__(self, key: str, title: str):
+        super().__init__()
+        self.key = key
+        self.title = title
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+
+
+class StreamedFlowables(list):
+    """
+    Flowable list for SimpleDocTemplate.build() that is filled one point at a
+    time: build() lays out and removes flowables from the front and checks
+    len() before each one, so the next point's flowables are only built once
+    the previous point's are on the canvas. The flowables in memory never
+    exceed one point; finished pages stay in the canvas until the file is
+    saved (--batch-size caps how many points that is).
+    """
+
+    def __init__(self, element_lists):
+        super().__init__()
+        self._pending = iter(element_lists)
+
+    def __len__(self):
+        while not list.__len__(self):
+            nxt = next(self._pending, None)
+            if nxt is None:
+                break
+            self.extend(nxt)
+        return list.__len__(self)
+
+
+def _show_outline(canv, doc):
+    canv.showOutline()
 
 
+def build_combined_pdf(items: list, pdf_path: str) -> tuple:
+    """
+    One PDF for a list of (point_id, record, photo_files): every point starts on
+    a new page with an outline entry. Runs in a worker process in parallel
+    mode. Returns (label, pdf_path or None, seconds, error or None).
+    """
+    t0 = time.perf_counter()
+    label = f"{os.path.basename(pdf_path)} ({len(items)} points: {items[0][0]} .. {items[-1][0]})"
+
+    def element_lists():
+        for i, (point_id, record, photo_files) in enumerate(items):
+            elements = [PointBookmark(f"point{i}", point_id)]
+            elements += point_elements(point_id, record, photo_files)
+            if i:
+                elements.insert(0, PageBreak())
+            yield elements
+
+    try:
+        doc = SimpleDocTemplate(pdf_path, pagesize=letter, pageCompression=1)
+        doc.build(StreamedFlowables(element_lists()), onFirstPage=_show_outline)
+        return label, pdf_path, time.perf_counter() - t0, None
+    except Exception as exc:
+        return label, None, time.perf_counter() - t0, str(exc)
+
+
+def build_pdf_chunk(items: list, output_dir: str) -> list:
+    """
+    Build the PDFs for a list of (point_id, record, photo_files); runs in a worker
+    process in parallel mode. Returns [(point_id, pdf_path or None, seconds, error or None)].
+    """
+    results = []
+    for point_id, record, photo_files in items:
+        t0 = time.perf_counter()
+        try:
+            pdf_path = build_pdf_for_point(point_id, record, output_dir, photo_files)
+            results.append((point_id, pdf_path, time.perf_counter() - t0, None))
+        except Exception as exc:
+            results.append((point_id, None, time.perf_counter() - t0, str(exc)))
+    return results
+
+
+def point_records(df: pd.DataFrame) -> list:
+    """
+    [(point_id, record, photo_files)] in PointID order, skipping missing
+    PointIDs. Records come from one aggregate_records pass, photos from one
+    PhotoIndex listing of PHOTOS_DIR, so building a PDF is layout only.
+    """
+    records = aggregate_records(df)
+    point_ids = sorted(records)
+    photos = get_photo_index().prefix_map(point_ids)
+    return [(pid, records[pid], photos[pid.replace("-", "")]) for pid in point_ids]
+
+
+def report_result(result, done: int, total: int):
+    point_id, pdf_path, seconds, error = result
+    if error:
+        print(f"[{done}/{total}] FAILED {point_id} after {seconds:.2f}s: {error}")
+    else:
+        print(f"[{done}/{total}] Created PDF for {point_id}: {pdf_path} ({seconds:.2f}s)")
+
+
+def print_summary(results: list, elapsed: float, workers: int, points: int = None):
+    ok = [r for r in results if r[3] is None]
+    failed = [r for r in results if r[3] is not None]
+    points = len(results) if points is None else points
+    rate = points / elapsed if elapsed else 0.0
+    print(
+        f"\nDone: {len(ok)} PDF(s) written, {len(failed)} failed, "
+        f"{elapsed:.1f}s total with {workers} worker(s) ({rate:.2f} points/s)."
+    )
+    if ok:
+        print("Slowest:")
+        for point_id, _, seconds, _ in sorted(ok, key=lambda r: r[2], reverse=True)[:SLOWEST_TO_PRINT]:
+            print(f"  {seconds:7.2f}s  {point_id}")
+    for point_id, _, _, error in failed:
+        print(f"  FAILED {point_id}: {error}")
 
-def main():
+
+def combined_pdf_paths(n_batches: int) -> list:
+    if n_batches == 1:
+        return [os.path.join(OUTPUT_DIR, f"{COMBINED_NAME}.pdf")]
+    return [os.path.join(OUTPUT_DIR, f"{COMBINED_NAME}_{i:04d}.pdf") for i in range(1, n_batches + 1)]
+
+
+def main(workers: int = WORKERS, chunk_size: int = CHUNK_SIZE,
+         combined: bool = False, batch_size: int = 0):
     make_output_dir(OUTPUT_DIR)
 
     # Read CSV
@@ -166,14 +448,60 @@ def main():
     if "PointID" not in df.columns:
         raise ValueError("CSV must contain a 'PointID' column.")
 
-    # Group by PointID and build one PDF per group
-    grouped = df.groupby("PointID", dropna=True)
+    # One record per PointID, then one PDF per point
+    points = point_records(df)
+    total = len(points)
+    results = []
+    t0 = time.perf_counter()
+
+    if combined:
+        # One PDF for all points, or one per batch_size points
+        if not points:
+            print("No PointIDs in the CSV.")
+            return
+        size = batch_size if batch_size > 0 else total
+        batches = [points[i:i + size] for i in range(0, total, size)]
+        paths = combined_pdf_paths(len(batches))
+        if workers > 1 and len(batches) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                futures = [ex.submit(build_combined_pdf, b, p) for b, p in zip(batches, paths)]
+                for fut in as_completed(futures):
+                    results.append(fut.result())
+                    report_result(results[-1], len(results), len(batches))
+        else:
+            for batch, path in zip(batches, paths):
+                results.append(build_combined_pdf(batch, path))
+                report_result(results[-1], len(results), len(batches))
+        print_summary(results, time.perf_counter() - t0, workers if len(batches) > 1 else 1, total)
+        return
+
+    if workers > 1 and total > 1:
+        chunk_size = max(1, chunk_size)
+        chunks = [points[i:i + chunk_size] for i in range(0, total, chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(build_pdf_chunk, chunk, OUTPUT_DIR) for chunk in chunks]
+            for fut in as_completed(futures):
+                for result in fut.result():
+                    results.append(result)
+                    report_result(result, len(results), total)
+    else:
+        for item in points:
+            result = build_pdf_chunk([item], OUTPUT_DIR)[0]
+            results.append(result)
+            report_result(result, len(results), total)
 
-    for point_id, group in grouped:
-        if pd.isna(point_id):
-            continue
-        build_pdf_for_point(str(point_id), group, OUTPUT_DIR)
+    print_summary(results, time.perf_counter() - t0, workers if total > 1 else 1)
 
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="One PDF per PointID from the data request CSV.")
+    ap.add_argument("--workers", type=int, default=WORKERS,
+                    help=f"Worker processes (default {WORKERS}; 1 = build in this process)")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                    help=f"PointIDs per worker task (default {CHUNK_SIZE})")
+    ap.add_argument("--combined", action="store_true",
+                    help=f"Write all points into {COMBINED_NAME}.pdf (one outline entry per PointID)")
+    ap.add_argument("--batch-size", type=int, default=0,
+                    help="With --combined: points per PDF (default 0 = all in one PDF)")
+    args = ap.parse_args()
+    main(args.workers, args.chunk_size, args.combined, args.batch_size)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Database backends for find_datasource_tables.py.
+
+A backend covers everything database-specific in the probe:
+  connect(timeout)                      -> connection (cursor() usable as a context manager)
+  discover_objects(cur)                 -> [(schema, object, has_ds, has_ma), ...]
+  load_values(cur, values)              -> (re)load the per-connection values temp table
+  set_probe_sql(schema, object, cols)   -> SELECT of the loaded values present in the object
+  per_value_sql(schema, object, cols)   -> existence probe, one ? per column
+  is_timeout(exc)                       -> True if exc is a query timeout
+  close()
+
+Backends:
+  SqlServerBackend  live SQL Server through pyodbc (the real run)
+  SQLiteBackend     local stand-in: loads exported CSVs (InvalidWaterLevels.csv,
+                    WLs_multiMeasAgencies.csv, InvalidWellData_combined.csv, ...)
+                    into a temporary SQLite file, one table per CSV named after
+                    the file, so the probe modes can be benchmarked offline.
+
+Both match values the same way, case-insensitive. Columns are compared as
+stored, so an index on DataSource/MeasuringAgency can be used; with
+trim_columns=True values stored with surrounding spaces (or in non-text
+columns) are also found, through a trimmed/converted comparison that scans
+the object.
+"""
+
+import csv
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+
+def qident(name: str) -> str:
+    """Bracket-quote an identifier and escape closing bracket (SQL Server and SQLite)."""
+    return f"[{name.replace(']', ']]')}]"
+
+
+class SqlServerBackend:
+    """SQL Server through pyodbc; values go into a #temp table per connection."""
+
+    name = "sqlserver"
+    CI_COLLATION = "COLLATE SQL_Latin1_General_CP1_CI_AS"
+    VALUES_TEMP_TABLE = "#ds_values"
+
+    def __init__(self, connect, schema: str = "dbo", trim_columns: bool = False):
+        self._connect = connect
+        self.schema = schema
+        self.trim_columns = trim_columns
+
+    def connect(self, timeout: int = 0):
+        conn = self._connect()
+        conn.timeout = timeout  # per-query timeout (0 = none)
+        return conn
+
+    def discover_objects(self, cur):
+        cur.execute("""
+            SELECT
+              s.name AS schema_name,
+              o.name AS object_name,
+              MAX(CASE WHEN c.name = 'DataSource'      THEN 1 ELSE 0 END) AS has_ds,
+              MAX(CASE WHEN c.name = 'MeasuringAgency' THEN 1 ELSE 0 END) AS has_ma
+            FROM sys.objects o
+            JOIN sys.schemas s ON s.schema_id = o.schema_id
+            JOIN sys.columns c ON c.object_id = o.object_id
+            WHERE s.name = ?
+              AND o.type IN ('U','V')
+              AND c.name IN ('DataSource','MeasuringAgency')
+            GROUP BY s.name, o.name
+            ORDER BY o.name
+        """, (self.schema,))
+        return [(r.schema_name, r.object_name, int(r.has_ds), int(r.has_ma)) for r in cur.fetchall()]
+
+    def _trimmed(self, col: str) -> str:
+        return f"LTRIM(RTRIM(CONVERT(NVARCHAR(4000), t.{qident(col)})))"
+
+    def load_values(self, cur, values: Sequence[str]):
+        t = self.VALUES_TEMP_TABLE
+        cur.execute(f"IF OBJECT_ID('tempdb..{t}') IS NOT NULL DROP TABLE {t}")
+        cur.execute(f"CREATE TABLE {t} (v NVARCHAR(4000) {self.CI_COLLATION} NOT NULL)")
+        cur.fast_executemany = True
+        cur.executemany(f"INSERT INTO {t} (v) VALUES (?)", [(v,) for v in values])
+        cur.execute(f"CREATE INDEX ix_ds_values_v ON {t} (v)")
+
+    def set_probe_sql(self, sch: str, obj: str, cols: List[str]) -> str:
+        """
+        One existence check per #temp value on the raw columns (index seeks
+        where the object has an index). With trim_columns the object is also
+        scanned once for its distinct trimmed values.
+        """
+        src = f"{qident(sch)}.{qident(obj)}"
+        raw = " OR ".join(f"t.{qident(c)} = v.v {self.CI_COLLATION}" for c in cols)
+        sql = f"SELECT v.v FROM {self.VALUES_TEMP_TABLE} AS v WHERE EXISTS (SELECT 1 FROM {src} AS t WHERE {raw})"
+        if self.trim_columns:
+            found = " UNION ".join(
+                f"SELECT {self._trimmed(c)} {self.CI_COLLATION} AS val FROM {src} AS t" for c in cols
+            )
+            sql += f" UNION SELECT v.v FROM {self.VALUES_TEMP_TABLE} AS v JOIN ({found}) AS d ON d.val = v.v"
+        return sql
+
+    def per_value_sql(self, sch: str, obj: str, cols: List[str]) -> str:
+        if self.trim_columns:
+            where_clauses = [
+                f"{self._trimmed(c)} {self.CI_COLLATION} = LTRIM(RTRIM(?)) {self.CI_COLLATION}"
+                for c in cols
+            ]
+        else:
+            where_clauses = [f"t.{qident(c)} = ? {self.CI_COLLATION}" for c in cols]
+        return (
+            f"SELECT TOP (1) 1 "
+            f"FROM {qident(sch)}.{qident(obj)} AS t "
+            f"WHERE " + " OR ".join(where_clauses)
+        )
+
+    def is_timeout(self, e: Exception) -> bool:
+        """pyodbc query timeouts surface as SQLSTATE HYT00 / HYT01."""
+        return bool(e.args) and str(e.args[0]) in ("HYT00", "HYT01")
+
+    def close(self):
+        pass
+
+
+class _SQLiteCursor(sqlite3.Cursor):
+    """Cursor usable as a context manager (like pyodbc) that arms the query timeout."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=()):
+        self.connection.arm_timeout()
+        return super().execute(sql, params)
+
+
+class _SQLiteConnection(sqlite3.Connection):
+    """sqlite3 connection with a per-query timeout (interrupts via the progress handler)."""
+
+    timeout = 0
+    _deadline = None
+
+    def cursor(self, factory=_SQLiteCursor):
+        return super().cursor(factory)
+
+    def arm_timeout(self):
+        self._deadline = time.monotonic() + self.timeout if self.timeout else None
+
+    def _past_deadline(self) -> int:
+        return int(self._deadline is not None and time.monotonic() > self._deadline)
+
+
+class SQLiteBackend:
+    """
+    Local stand-in: each CSV becomes a table named after the file (all TEXT,
+    empty cells NULL), reported under `schema` like the dbo objects.
+    """
+
+    name = "sqlite"
+    VALUES_TEMP_TABLE = "temp.ds_values"
+
+    def __init__(self, csv_paths: Sequence[Path], schema: str = "dbo", trim_columns: bool = False):
+        self.schema = schema
+        self.trim_columns = trim_columns
+        self._dir = Path(tempfile.mkdtemp(prefix="datasource_standin_"))
+        self.db_path = self._dir / "standin.sqlite"
+        self.tables = {}  # table -> row count
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for path in csv_paths:
+                self.tables[Path(path).stem] = self._load_csv(conn, Path(path))
+            conn.commit()
+        except BaseException:
+            conn.close()
+            self.close()  # don't leave the half-built temp directory behind
+            raise
+        conn.close()
+
+    @staticmethod
+    def _load_csv(conn, path: Path) -> int:
+        table = path.stem
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                raise ValueError(f"{path} has no header row.")
+            conn.execute(f"DROP TABLE IF EXISTS {qident(table)}")
+            conn.execute(f"CREATE TABLE {qident(table)} ({', '.join(qident(c) + ' TEXT' for c in header)})")
+            placeholders = ", ".join("?" * len(header))
+            n = len(header)
+            rows = ([(v if v != "" else None) for v in (row + [""] * n)[:n]] for row in reader)
+            cur = conn.executemany(f"INSERT INTO {qident(table)} VALUES ({placeholders})", rows)
+            return cur.rowcount
+
+    def connect(self, timeout: int = 0):
+        conn = sqlite3.connect(self.db_path, factory=_SQLiteConnection, check_same_thread=False)
+        conn.timeout = timeout
+        conn.set_progress_handler(conn._past_deadline, 10_000)
+        return conn
+
+    def discover_objects(self, cur):
+        cur.execute("""
+            SELECT
+              m.name AS object_name,
+              MAX(p.name = 'DataSource' COLLATE NOCASE)      AS has_ds,
+              MAX(p.name = 'MeasuringAgency' COLLATE NOCASE) AS has_ma
+            FROM sqlite_master m
+            JOIN pragma_table_info(m.name) p
+            WHERE m.type IN ('table', 'view')
+              AND p.name COLLATE NOCASE IN ('DataSource', 'MeasuringAgency')
+            GROUP BY m.name
+            ORDER BY m.name
+        """)
+        return [(self.schema, name, int(has_ds), int(has_ma)) for name, has_ds, has_ma in cur.fetchall()]
+
+    def _trimmed(self, col: str) -> str:
+        return f"TRIM(CAST(t.{qident(col)} AS TEXT))"
+
+    def load_values(self, cur, values: Sequence[str]):
+        t = self.VALUES_TEMP_TABLE
+        cur.execute(f"DROP TABLE IF EXISTS {t}")
+        cur.execute(f"CREATE TABLE {t} (v TEXT COLLATE NOCASE NOT NULL)")
+        cur.executemany(f"INSERT INTO {t} (v) VALUES (?)", [(v,) for v in values])
+        cur.execute(f"CREATE INDEX temp.ix_ds_values_v ON ds_values (v)")
+
+    def set_probe_sql(self, sch: str, obj: str, cols: List[str]) -> str:
+        """The stand-in tables have no indexes: one scan, joined to the (indexed) values table."""
+        value = self._trimmed if self.trim_columns else (lambda c: f"t.{qident(c)}")
+        found = " UNION ".join(f"SELECT {value(c)} AS val FROM {qident(obj)} AS t" for c in cols)
+        return (
+            f"SELECT DISTINCT v.v FROM {self.VALUES_TEMP_TABLE} AS v "
+            f"JOIN ({found}) AS d ON d.val = v.v COLLATE NOCASE"
+        )
+
+    def per_value_sql(self, sch: str, obj: str, cols: List[str]) -> str:
+        if self.trim_columns:
+            where_clauses = [f"{self._trimmed(c)} = TRIM(?) COLLATE NOCASE" for c in cols]
+        else:
+            where_clauses = [f"t.{qident(c)} = ? COLLATE NOCASE" for c in cols]
+        return f"SELECT 1 FROM {qident(obj)} AS t WHERE " + " OR ".join(where_clauses) + " LIMIT 1"
+
+    def is_timeout(self, e: Exception) -> bool:
+        return isinstance(e, sqlite3.OperationalError) and "interrupted" in str(e)
+
+    def close(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cluster transfer metrics errors into templates, so reviewers triage tens of
+templates per NMAquifer_Table.Field instead of one AMP_review row per error.
+
+Each error is normalized with clean_error (transfer_to_amp_review), then the
+parts that vary between instances become placeholders:
+  Invalid organization: <organization>   Invalid sensor_type: <sensor_type>
+  <datetime>                             row.SerialNo=<id>, name=<id>
+  Key (...)=(<value>)                    PointID: <point_id>
+e.g. every "no deployment at 2017-03-13 01:00:00" row is one template
+"no deployment at <datetime>".
+
+One output row per (NMAquifer_Table.Field, template), most frequent first:
+  NMAquifer_Table.Field | Error template | Count | PointIDs | Example PointID | Example error
+written to TEMPLATES_SHEET_NAME in the AMP_review spreadsheet and/or a CSV.
+
+Usage:
+  python error_templates.py [METRICS.csv] [--csv templates.csv] [--no-sheets] [--top 20]
+"""
+
+import argparse
+import csv
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from sheets_batch import SheetsBatchWriter
+from transfer_metrics_io import run_transfer_metrics_pass
+from transfer_to_amp_review import (
+    ERROR_CACHE_SIZE,
+    SERVICE_ACCOUNT_FILE,
+    SPREADSHEET_ID,
+    AmpRowSink,
+    ensure_tab,
+    get_sheets_service,
+)
+
+# ====== CONFIG ======
+TRANSFER_METRICS_PATH = r"transfer_metrics_metrics_2025-11-26T02_00_31.csv"
+TEMPLATES_SHEET_NAME = "AMP_review_templates"
+# ====================
+
+HEADER = ["NMAquifer_Table.Field", "Error template", "Count", "PointIDs", "Example PointID", "Example error"]
+
+# Variable parts of a cleaned error; each named group becomes "<name>"
+_param_re = re.compile(
+    r"(?<=Invalid organization: )(?P<organization>[^|]+?)(?=\s*\||',\s|'?$)"
+    r"|(?<=Invalid sensor_type: )(?P<sensor_type>[^|',]+?)(?=\s*[|',]|$)"
+    r"|\b(?P<datetime>\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?)\b"
+    r"|(?<==)(?P<id>[\w\-/]*\d[\w\-/]*)"
+    r"|(?<=\)=\()(?P<value>(?:[^()]|\([^()]*\))*)(?=\))"
+    r"|(?<=PointID: )(?P<point_id>\S+)"
+)
+
+
+@lru_cache(maxsize=ERROR_CACHE_SIZE)
+def error_template(error: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    """
+    Cleaned error -> (template, ((placeholder, value), ...)), e.g.
+      "no deployment at 2017-03-13 01:00:00"
+      -> ("no deployment at <datetime>", (("datetime", "2017-03-13 01:00:00"),))
+    """
+    params = []
+
+    def _placeholder(m: re.Match) -> str:
+        name = m.lastgroup
+        params.append((name, m.group(name)))
+        return f"<{name}>"
+
+    template = _param_re.sub(_placeholder, error or "")
+    return template, tuple(params)
+
+
+class ErrorTemplateSink(AmpRowSink):
+    """
+    Sink for run_transfer_metrics_pass: the AMP_review rows, counted per
+    (NMAquifer_Table.Field, template) instead of kept one by one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.clusters: Dict[Tuple[str, str], dict] = {}
+        self.errors = 0
+
+    def on_row(self, ev):
+        row = self.amp_row(ev)
+        if row is not None:
+            self.add(*row)
+
+    def add(self, table_field: str, point_id: str, error: str):
+        template, _ = error_template(error)
+        cluster = self.clusters.get((table_field, template))
+        if cluster is None:
+            cluster = self.clusters[(table_field, template)] = {
+                "count": 0, "point_ids": set(), "example_point_id": point_id, "example_error": error,
+            }
+        cluster["count"] += 1
+        cluster["point_ids"].add(point_id)
+        self.errors += 1
+
+    def template_rows(self) -> List[list]:
+        """Output rows (see HEADER), most frequent template first."""
+        items = sorted(self.clusters.items(), key=lambda kv: (-kv[1]["count"], kv[0]))
+        return [
+            [tf, template, c["count"], len(c["point_ids"]), c["example_point_id"], c["example_error"]]
+            for (tf, template), c in items
+        ]
+
+
+def cluster_errors(path: Path) -> ErrorTemplateSink:
+    if not path.exists():
+        sys.exit(f"File not found: {path}")
+    sink = ErrorTemplateSink()
+    try:
+        run_transfer_metrics_pass(path, [sink])
+    except ValueError:
+        pass  # no header-delimited blocks → no rows
+    return sink
+
+
+def print_summary(sink: ErrorTemplateSink, top: int):
+    rows = sink.template_rows()
+    templates = {t for _, t in sink.clusters}
+    print(f"[info] {sink.errors} error(s) -> {len(rows)} (Table.Field, template) row(s), "
+          f"{len(templates)} distinct template(s).")
+    for tf, template, count, n_points, _, _ in rows[:top]:
+        print(f"  {count:>8}  {n_points:>6} pt  {tf}: {template}")
+    if len(rows) > top:
+        print(f"  ... {len(rows) - top} more")
+
+
+def write_templates_csv(rows: List[list], csv_path: Path):
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    print(f"[done] Wrote {len(rows)} template row(s) to {csv_path}.")
+
+
+def publish_templates(rows: List[list]):
+    """Replace TEMPLATES_SHEET_NAME!A:F with the template rows (one batchClear + batchUpdate)."""
+    service = get_sheets_service(SERVICE_ACCOUNT_FILE)
+    ensure_tab(service, SPREADSHEET_ID, TEMPLATES_SHEET_NAME)
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+    writer.clear(f"'{TEMPLATES_SHEET_NAME}'!A:F")
+    writer.write(f"'{TEMPLATES_SHEET_NAME}'!A1", [HEADER] + rows)
+    writer.flush()
+    print(f"[done] Wrote {len(rows)} template row(s) to {TEMPLATES_SHEET_NAME}!A:F.")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-template error counts by NMAquifer_Table.Field.")
+    ap.add_argument("path", nargs="?", default=TRANSFER_METRICS_PATH, help="Transfer metrics file")
+    ap.add_argument("--csv", help="Also write the template rows to this CSV")
+    ap.add_argument("--no-sheets", action="store_true", help=f"Don't write {TEMPLATES_SHEET_NAME}")
+    ap.add_argument("--top", type=int, default=20, help="Templates to print (default 20)")
+    args = ap.parse_args()
+
+    sink = cluster_errors(Path(args.path))
+    print_summary(sink, args.top)
+    rows = sink.template_rows()
+    if args.csv:
+        write_templates_csv(rows, Path(args.csv))
+    if not args.no_sheets:
+        publish_templates(rows)
+
+
+if __name__ == "__main__":
+    main()
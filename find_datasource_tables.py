@@ -1,7 +1,48 @@
 #!/usr/bin/env python3
-import sys, csv
+"""
+Find the dbo tables/views whose DataSource or MeasuringAgency column contains
+each DataSource value of an input CSV. Writes DataSource,DataTable pairs.
+
+Probe modes:
+  set        (default) load all input values into a temp table once, then
+             run one SELECT DISTINCT join per table/view -> M queries
+  per-value  one existence probe per input value x table/view -> N x M queries
+
+Both modes match the same way (case-insensitive) and write the same pairs in
+the same order. Columns are compared as stored so source-side indexes can be
+used; --trim-columns also matches values stored with surrounding spaces (or in
+non-text columns), at the cost of a scan of every table/view.
+
+Tables/views are probed concurrently by --workers threads sharing a bounded
+pool of connections (one values temp table per connection in set mode). Each
+object gets --timeout seconds; a timed-out or failing object is reported and
+skipped instead of stalling the run. Per-object timings are printed (slowest
+first) and can be saved with --timings.
+
+Backends (datasource_backends.py):
+  sqlserver  (default) the live database through pyodbc
+  sqlite     local stand-in built from exported CSVs (--csv, default STANDIN_CSVS)
+
+--benchmark runs every mode/worker combination on the chosen backend, prints
+the timings and exits non-zero if they don't all return the same pairs.
+
+Usage:
+  python find_datasource_tables.py INPUT.csv OUTPUT.csv [--mode set|per-value]
+      [--workers 4] [--timeout 300] [--timings timings.csv]
+      [--backend sqlserver|sqlite] [--csv A.csv B.csv ...] [--trim-columns] [--benchmark]
+"""
+import argparse, csv, queue, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-import pyodbc
+from typing import NamedTuple, Set
+
+try:
+    import pyodbc
+except ImportError:  # only needed for the sqlserver backend
+    pyodbc = None
+
+from datasource_backends import SQLiteBackend, SqlServerBackend
 
 # ---- CONFIG: edit these for your environment ----
 SERVER   = "SQL Server"
@@ -11,13 +52,26 @@ TRUSTED_CONNECTION = True  # set False and add UID/PWD if needed
 UID = ""
 PWD = ""
 SCHEMA = "dbo"
+PROBE_MODE = "set"  # "set" or "per-value"
+WORKERS = 4  # concurrent table/view probes (= pooled connections)
+OBJECT_TIMEOUT_SECONDS = 300  # per table/view; 0 = no timeout
+SLOWEST_TO_PRINT = 10
+BACKEND = "sqlserver"  # or "sqlite" (local stand-in)
+TRIM_COLUMNS = False  # also match trimmed/converted column values (scans every object)
+# CSV exports loaded as tables by the sqlite stand-in
+STANDIN_CSVS = [
+    "InvalidWaterLevels.csv",
+    "WLs_multiMeasAgencies.csv",
+    "InvalidWellData_combined.csv",
+]
 # -------------------------------------------------
 
-def qident(name: str) -> str:
-    """Bracket-quote an identifier and escape closing bracket."""
-    return f"[{name.replace(']', ']]')}]"
+PROBE_MODES = ["set", "per-value"]
+BACKENDS = ["sqlserver", "sqlite"]
 
 def get_conn():
+    if pyodbc is None:
+        sys.exit("pyodbc is not installed (needed for --backend sqlserver).")
     parts = [f"Driver={ODBC_DRIVER}", f"Server={SERVER}", f"Database={DATABASE}"]
     if TRUSTED_CONNECTION:
         parts.append("Trusted_Connection=yes")
@@ -25,6 +79,17 @@ def get_conn():
         parts += [f"UID={UID}", f"PWD={PWD}"]
     return pyodbc.connect(";".join(parts))
 
+def make_backend(name: str = BACKEND, csv_paths=None, trim_columns: bool = TRIM_COLUMNS):
+    if name == "sqlite":
+        paths = [Path(p) for p in (csv_paths or STANDIN_CSVS)]
+        missing = [str(p) for p in paths if not p.exists()]
+        if missing:
+            sys.exit(f"Stand-in CSV(s) not found: {missing}")
+        backend = SQLiteBackend(paths, SCHEMA, trim_columns)
+        print(f"Loaded stand-in tables: {backend.tables}")
+        return backend
+    return SqlServerBackend(get_conn, SCHEMA, trim_columns)
+
 def read_csv_values(path: Path):
     vals = []
     with open(path, "r", newline="", encoding="utf-8-sig") as f:
@@ -43,82 +108,156 @@ def read_csv_values(path: Path):
             out.append(v)
     return out
 
-def discover_objects(cur):
-    """Return list of (schema, object, has_ds, has_ma) for dbo tables/views."""
-    cur.execute("""
-        SELECT
-          s.name AS schema_name,
-          o.name AS object_name,
-          MAX(CASE WHEN c.name = 'DataSource'      THEN 1 ELSE 0 END) AS has_ds,
-          MAX(CASE WHEN c.name = 'MeasuringAgency' THEN 1 ELSE 0 END) AS has_ma
-        FROM sys.objects o
-        JOIN sys.schemas s ON s.schema_id = o.schema_id
-        JOIN sys.columns c ON c.object_id = o.object_id
-        WHERE s.name = ?
-          AND o.type IN ('U','V')
-          AND c.name IN ('DataSource','MeasuringAgency')
-        GROUP BY s.name, o.name
-        ORDER BY o.name
-    """, (SCHEMA,))
-    return [(r.schema_name, r.object_name, int(r.has_ds), int(r.has_ma)) for r in cur.fetchall()]
-
-def main(in_csv: Path, out_csv: Path):
-    values = read_csv_values(in_csv)
-    if not values:
-        with open(out_csv, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f); w.writerow(["DataSource","DataTable"])
-        print("No DataSource values in input; wrote empty output with header.")
-        return
+def match_columns(has_ds, has_ma):
+    """Columns probed for an object: DataSource and/or MeasuringAgency."""
+    cols = []
+    if has_ds:
+        cols.append("DataSource")
+    if has_ma:
+        cols.append("MeasuringAgency")
+    return cols
 
-    conn = get_conn()
-    conn.timeout = 0  # no query timeout
-    pairs = []  # (DataSource, DataTable)
+# ---- per-value mode: N x M queries ----
 
-    with conn.cursor() as cur:
-        objs = discover_objects(cur)
-        if not objs:
-            with open(out_csv, "w", newline="", encoding="utf-8") as f:
-                csv.writer(f).writerow(["DataSource","DataTable"])
-            print("No dbo tables/views with DataSource/MeasuringAgency found.")
-            return
+def probe_per_value(cur, backend, sch, obj, cols, values, deadline=None):
+    """Probe every value against one object; returns the lowercased values found."""
+    sql = backend.per_value_sql(sch, obj, cols)
+    found = set()
+    for v in values:
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"object timeout after {len(found)} match(es)")
+        cur.execute(sql, (v,) * len(cols))
+        if cur.fetchone():
+            found.add(v.lower())
+    return found
+
+# ---- set mode: values loaded once per connection, M queries ----
+
+def probe_set_based(cur, backend, sch, obj, cols):
+    """One query for one object; returns the lowercased input values found."""
+    cur.execute(backend.set_probe_sql(sch, obj, cols))
+    return {r[0].lower() for r in cur.fetchall()}
+
+# ---- connection pool + per-object probing ----
+
+class ConnectionPool:
+    """Bounded pool of connections shared by the probe workers (created on demand)."""
+
+    def __init__(self, connect, size: int):
+        self._connect = connect
+        self._size = size
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._conns = []
+        self.prepared = set()  # id(conn) of connections with the values #temp table loaded
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            new = self._idle.empty() and len(self._conns) < self._size
+            if new:
+                conn = self._connect()
+                self._conns.append(conn)
+        if not new:
+            conn = self._idle.get()  # blocks until a connection is returned
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+class ObjectResult(NamedTuple):
+    table: str       # schema.object
+    status: str      # ok | timeout | error
+    seconds: float
+    found: Set[str]  # lowercased input values present in the object
+    message: str
 
-        # Prebuild per-object predicate & parameter layout
-        obj_checks = []
-        for sch, obj, has_ds, has_ma in objs:
-            where_clauses = []
-            params_layout = []  # 'ds' or 'ma' per placeholder position
-            if has_ds:
-                where_clauses.append(
-                    "LTRIM(RTRIM(CONVERT(NVARCHAR(4000), t.[DataSource]))) "
-                    "COLLATE SQL_Latin1_General_CP1_CI_AS = LTRIM(RTRIM(?)) COLLATE SQL_Latin1_General_CP1_CI_AS"
-                )
-                params_layout.append('v')
-            if has_ma:
-                where_clauses.append(
-                    "LTRIM(RTRIM(CONVERT(NVARCHAR(4000), t.[MeasuringAgency]))) "
-                    "COLLATE SQL_Latin1_General_CP1_CI_AS = LTRIM(RTRIM(?)) COLLATE SQL_Latin1_General_CP1_CI_AS"
-                )
-                params_layout.append('v')
-
-            sql = (
-                f"SELECT TOP (1) 1 "
-                f"FROM {qident(sch)}.{qident(obj)} AS t "
-                f"WHERE " + " OR ".join(where_clauses)
-            )
-            obj_checks.append((sch, obj, sql, params_layout))
-
-        # For each input value, probe each object
-        for v in values:
-            for sch, obj, sql, params_layout in obj_checks:
-                try:
-                    params = tuple(v for _ in params_layout)
-                    cur.execute(sql, params)
-                    row = cur.fetchone()
-                    if row:
-                        pairs.append((v, f"{sch}.{obj}"))
-                except Exception as e:
-                    # Skip problematic objects but keep going
-                    print(f"Skipped {sch}.{obj}: {e}")
+def probe_object(pool: ConnectionPool, backend, mode, values, sch, obj, has_ds, has_ma, timeout=0):
+    """Probe one table/view on a pooled connection; never raises."""
+    cols = match_columns(has_ds, has_ma)
+    t0 = time.monotonic()
+    try:
+        with pool.connection() as conn:
+            t0 = time.monotonic()  # don't count time spent waiting for a connection
+            with conn.cursor() as cur:
+                if mode == "set":
+                    if id(conn) not in pool.prepared:
+                        backend.load_values(cur, values)
+                        pool.prepared.add(id(conn))
+                        t0 = time.monotonic()
+                    found = probe_set_based(cur, backend, sch, obj, cols)
+                else:
+                    deadline = t0 + timeout if timeout else None
+                    found = probe_per_value(cur, backend, sch, obj, cols, values, deadline)
+        return ObjectResult(f"{sch}.{obj}", "ok", time.monotonic() - t0, found, "")
+    except Exception as e:
+        status = "timeout" if isinstance(e, TimeoutError) or backend.is_timeout(e) else "error"
+        return ObjectResult(f"{sch}.{obj}", status, time.monotonic() - t0, set(), str(e))
+
+def probe_objects(pool: ConnectionPool, backend, mode, objs, values, workers=WORKERS, timeout=0):
+    """Probe all objects with a worker pool; results in objs order."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        futures = [
+            ex.submit(probe_object, pool, backend, mode, values, sch, obj, has_ds, has_ma, timeout)
+            for sch, obj, has_ds, has_ma in objs
+        ]
+        results = []
+        for fut in futures:
+            res = fut.result()
+            if res.status != "ok":
+                # Skip problematic objects but keep going
+                print(f"Skipped {res.table} ({res.status} after {res.seconds:.1f}s): {res.message}")
+            results.append(res)
+    return results
+
+def write_pairs(out_csv: Path, pairs):
+    with open(out_csv, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["DataSource","DataTable"])
+        w.writerows(pairs)
+
+def report_timings(results, timings_csv: Path = None):
+    """Print the slowest objects; optionally write every object's timing to CSV."""
+    ranked = sorted(results, key=lambda r: r.seconds, reverse=True)
+    print(f"Slowest tables/views (of {len(results)}):")
+    for r in ranked[:SLOWEST_TO_PRINT]:
+        print(f"  {r.seconds:8.2f}s  {r.status:<7}  {len(r.found):>5} match(es)  {r.table}")
+    if timings_csv:
+        with open(timings_csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["DataTable", "Status", "Seconds", "Matches", "Message"])
+            for r in ranked:
+                w.writerow([r.table, r.status, f"{r.seconds:.3f}", len(r.found), r.message])
+        print(f"Wrote per-object timings to {timings_csv}")
+
+def find_pairs(backend, values, mode=PROBE_MODE, workers=WORKERS, timeout=OBJECT_TIMEOUT_SECONDS):
+    """
+    Discover the objects and probe them on a fresh connection pool.
+    Returns (objs, per-object results, de-duplicated (DataSource, DataTable) pairs).
+    """
+    pool = ConnectionPool(lambda: backend.connect(timeout), max(1, workers))
+    try:
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                objs = backend.discover_objects(cur)
+        results = probe_objects(pool, backend, mode, objs, values, workers, timeout) if objs else []
+    finally:
+        pool.close()
+
+    # pairs ordered by input value, then object (same as the original probe loop)
+    pairs = [
+        (v, r.table)
+        for v in values
+        for r in results
+        if v.lower() in r.found
+    ]
 
     # de-dup final pairs
     seen = set()
@@ -128,16 +267,80 @@ def main(in_csv: Path, out_csv: Path):
         if key not in seen:
             seen.add(key)
             uniq_pairs.append((ds, dt))
+    return objs, results, uniq_pairs
 
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["DataSource","DataTable"])
-        w.writerows(uniq_pairs)
+def benchmark(backend, values, workers=WORKERS, timeout=OBJECT_TIMEOUT_SECONDS):
+    """Run every mode/worker combination; returns True if all return the same pairs."""
+    runs = []
+    for mode in PROBE_MODES:
+        for n in sorted({1, max(1, workers)}):
+            t0 = time.monotonic()
+            objs, results, pairs = find_pairs(backend, values, mode, n, timeout)
+            runs.append((mode, n, time.monotonic() - t0, pairs, results))
+
+    print(f"Benchmark on {backend.name}: {len(values)} value(s) x {len(objs)} table(s)/view(s)")
+    print(f"  {'mode':<10} {'workers':>7} {'seconds':>9} {'pairs':>6}  failed objects")
+    reference = runs[0][3]
+    for mode, n, secs, pairs, results in runs:
+        failed = [f"{r.table} ({r.status})" for r in results if r.status != "ok"]
+        flag = "" if pairs == reference else "  <-- DIFFERENT PAIRS"
+        print(f"  {mode:<10} {n:>7} {secs:>9.2f} {len(pairs):>6}  {', '.join(failed) or '-'}{flag}")
+    return all(pairs == reference for _, _, _, pairs, _ in runs)
+
+def main(in_csv: Path, out_csv: Path, mode: str = PROBE_MODE, workers: int = WORKERS,
+         timeout: int = OBJECT_TIMEOUT_SECONDS, timings_csv: Path = None, backend=None):
+    """backend (built with make_backend() if not given) is closed on every return path."""
+    try:
+        values = read_csv_values(in_csv)
+        if not values:
+            write_pairs(out_csv, [])
+            print("No DataSource values in input; wrote empty output with header.")
+            return
+
+        backend = backend or make_backend()
+        t0 = time.monotonic()
+        objs, results, uniq_pairs = find_pairs(backend, values, mode, workers, timeout)
+    finally:
+        if backend is not None:
+            backend.close()
+    if not objs:
+        write_pairs(out_csv, [])
+        print("No dbo tables/views with DataSource/MeasuringAgency found.")
+        return
+    print(f"Probed {len(objs)} tables/views with {workers} worker(s) in {time.monotonic() - t0:.1f}s.")
+
+    write_pairs(out_csv, uniq_pairs)
+    report_timings(results, timings_csv)
 
     print(f"Wrote {len(uniq_pairs)} rows to {out_csv}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python find_datasource_tables.py INPUT.csv OUTPUT.csv")
-        sys.exit(1)
-    main(Path(sys.argv[1]).expanduser(), Path(sys.argv[2]).expanduser())
+    ap = argparse.ArgumentParser(description="Find dbo tables/views containing each DataSource value.")
+    ap.add_argument("input", help="Input CSV with a DataSource column")
+    ap.add_argument("output", help="Output CSV (DataSource,DataTable)")
+    ap.add_argument("--mode", choices=PROBE_MODES, default=PROBE_MODE,
+                    help="set: one query per table/view (default); per-value: one query per value x table/view")
+    ap.add_argument("--workers", type=int, default=WORKERS,
+                    help=f"Tables/views probed concurrently, one pooled connection each (default {WORKERS})")
+    ap.add_argument("--timeout", type=int, default=OBJECT_TIMEOUT_SECONDS,
+                    help=f"Seconds allowed per table/view, 0 = none (default {OBJECT_TIMEOUT_SECONDS})")
+    ap.add_argument("--timings", type=Path, default=None, help="Optional CSV of per-object timings")
+    ap.add_argument("--backend", choices=BACKENDS, default=BACKEND,
+                    help="sqlserver: live database (default); sqlite: local stand-in from --csv exports")
+    ap.add_argument("--csv", nargs="+", default=None,
+                    help="CSV exports for the sqlite stand-in (default: STANDIN_CSVS)")
+    ap.add_argument("--trim-columns", action="store_true", default=TRIM_COLUMNS,
+                    help="Also match column values with surrounding spaces / non-text types (scans every table/view)")
+    ap.add_argument("--benchmark", action="store_true",
+                    help="Compare all modes/worker counts on the backend instead of writing OUTPUT")
+    args = ap.parse_args()
+
+    backend = make_backend(args.backend, args.csv, args.trim_columns)
+    if args.benchmark:
+        try:
+            ok = benchmark(backend, read_csv_values(Path(args.input).expanduser()), args.workers, args.timeout)
+        finally:
+            backend.close()
+        sys.exit(0 if ok else 1)
+    main(Path(args.input).expanduser(), Path(args.output).expanduser(), args.mode,
+         args.workers, args.timeout, args.timings, backend)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Partitioned columnar (Parquet) store for the InvalidXxx exports, plus quick
+count queries that only read the partitions and columns they need.
+
+Layout (one dataset per export, hive partitioned):
+  invalid_data_store/<dataset>/NMAquiferTable=<table>/MatchField=<field>/part-0.parquet
+  invalid_data_store/manifest.json   (source size/mtime -> rebuild only when changed)
+
+All columns are stored as strings; the PointID column (SamplePointID for chem
+sample info), MeasuringAgency and DataSource are dictionary-encoded.
+
+Usage:
+  python invalid_data_store.py build [--force]
+  python invalid_data_store.py counts --by MatchField|MeasuringAgency|PointID
+         [--dataset water_levels] [--table dbo.WaterLevels] [--match-field MeasuringAgency]
+         [--point-id NM-23324] [--top 20]
+  python invalid_data_store.py point NM-23324
+
+pyarrow is required.
+"""
+
+import argparse
+import csv
+import json
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+# ====== CONFIG ======
+STORE_DIR = Path("invalid_data_store")
+
+# dataset name -> (source CSV, PointID column)
+SOURCES = {
+    "water_levels": ("InvalidWaterLevels.csv", "PointID"),
+    "well_data": ("InvalidWellData_combined.csv", "PointID"),
+    "chem_sample_info": ("InvalidChemSampleInfo.csv", "SamplePointID"),
+}
+# ====================
+
+PARTITION_COLUMNS = ["NMAquiferTable", "MatchField"]
+DICTIONARY_COLUMNS = ["MeasuringAgency", "DataSource"]  # plus each dataset's PointID column
+MANIFEST_NAME = "manifest.json"
+
+
+def _source_stamp(path: Path) -> Dict[str, float]:
+    st = path.stat()
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def load_manifest(store_dir: Path = STORE_DIR) -> Dict[str, dict]:
+    path = store_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict[str, dict], store_dir: Path = STORE_DIR):
+    store_dir.mkdir(parents=True, exist_ok=True)
+    with open(store_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_export(csv_path: Path, point_col: str) -> "pa.Table":
+    """Read one export with every column as string; dictionary-encode the low-cardinality ones."""
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), None) or []
+    missing = [c for c in PARTITION_COLUMNS + [point_col] if c not in header]
+    if missing:
+        raise ValueError(f"{csv_path} is missing required column(s): {missing}")
+
+    table = pacsv.read_csv(
+        csv_path,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: pa.string() for c in header},
+            strings_can_be_null=False,
+        ),
+    )
+    for col in [point_col] + DICTIONARY_COLUMNS:
+        if col in table.column_names:
+            i = table.column_names.index(col)
+            table = table.set_column(i, col, pc.dictionary_encode(table.column(col)))
+    return table
+
+
+def build_dataset(name: str, csv_path: Path, point_col: str, store_dir: Path = STORE_DIR) -> int:
+    """(Re)write one dataset, partitioned by NMAquiferTable / MatchField. Returns the row count."""
+    table = read_export(csv_path, point_col)
+    target = store_dir / name
+    if target.exists():
+        shutil.rmtree(target)
+    ds.write_dataset(
+        table,
+        target,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS]), flavor="hive"
+        ),
+    )
+    return table.num_rows
+
+
+def build_store(force: bool = False, store_dir: Path = STORE_DIR):
+    manifest = load_manifest(store_dir)
+    for name, (source, point_col) in SOURCES.items():
+        path = Path(source)
+        if not path.exists():
+            print(f"[skip] {name}: {source} not found")
+            continue
+        stamp = _source_stamp(path)
+        prev = manifest.get(name, {})
+        if not force and prev.get("stamp") == stamp and (store_dir / name).exists():
+            print(f"[ok]   {name}: {source} unchanged ({prev.get('rows')} rows)")
+            continue
+        rows = build_dataset(name, path, point_col, store_dir)
+        manifest[name] = {"source": source, "point_column": point_col, "rows": rows, "stamp": stamp}
+        save_manifest(manifest, store_dir)
+        print(f"[built] {name}: {rows} rows from {source}")
+
+
+def open_dataset(name: str, store_dir: Path = STORE_DIR) -> "ds.Dataset":
+    return ds.dataset(store_dir / name, format="parquet", partitioning="hive")
+
+
+def build_filter(table: Optional[str] = None, match_field: Optional[str] = None,
+                 point_col: Optional[str] = None, point_id: Optional[str] = None):
+    """Partition filters (pruned before any file is read) plus an optional PointID filter."""
+    expr = None
+    for col, val in (("NMAquiferTable", table), ("MatchField", match_field), (point_col, point_id)):
+        if val is None or col is None:
+            continue
+        cond = ds.field(col) == val
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def count_by(dataset: "ds.Dataset", column: str, flt=None) -> List[tuple]:
+    """[(value, count), ...] most frequent first, reading only `column` (+ filter columns)."""
+    if column not in dataset.schema.names:
+        raise ValueError(f"Column {column!r} is not in this dataset.")
+    col = dataset.to_table(columns=[column], filter=flt).column(column)
+    if pa.types.is_dictionary(col.type):
+        col = col.cast(col.type.value_type)
+    counts = pc.value_counts(col.combine_chunks())
+    pairs = zip(counts.field("values").to_pylist(), counts.field("counts").to_pylist())
+    return sorted(pairs, key=lambda vc: (-vc[1], str(vc[0])))
+
+
+def datasets_in_store(store_dir: Path = STORE_DIR) -> Dict[str, str]:
+    """dataset name -> PointID column for the datasets that have been built."""
+    manifest = load_manifest(store_dir)
+    return {
+        name: manifest[name]["point_column"]
+        for name in SOURCES
+        if name in manifest and (store_dir / name).exists()
+    }
+
+
+def cmd_counts(args):
+    available = datasets_in_store()
+    names = [args.dataset] if args.dataset else list(available)
+    for name in names:
+        if name not in available:
+            sys.exit(f"Dataset {name!r} is not built (run: python invalid_data_store.py build).")
+        point_col = available[name]
+        column = point_col if args.by == "PointID" else args.by
+        dataset = open_dataset(name)
+        if column not in dataset.schema.names:
+            print(f"\n{name}: no {column} column")
+            continue
+        flt = build_filter(args.table, args.match_field, point_col, args.point_id)
+        rows = count_by(dataset, column, flt)
+        total = sum(n for _, n in rows)
+        print(f"\n{name}: {total} row(s) by {column}")
+        for value, n in rows[:args.top] if args.top else rows:
+            print(f"  {n:>9}  {value}")
+        if args.top and len(rows) > args.top:
+            print(f"  ... {len(rows) - args.top} more")
+
+
+def cmd_point(args):
+    available = datasets_in_store()
+    if not available:
+        sys.exit("No datasets built (run: python invalid_data_store.py build).")
+    found = False
+    for name, point_col in available.items():
+        dataset = open_dataset(name)
+        tbl = dataset.to_table(columns=PARTITION_COLUMNS, filter=ds.field(point_col) == args.point_id)
+        if not tbl.num_rows:
+            continue
+        found = True
+        print(f"\n{name}: {tbl.num_rows} row(s) for {args.point_id}")
+        for (table, field), n in _count_pairs(tbl):
+            print(f"  {n:>7}  {table} / {field}")
+    if not found:
+        print(f"No invalid rows for {args.point_id}.")
+
+
+def _count_pairs(tbl: "pa.Table"):
+    counts = {}
+    for key in zip(*(tbl.column(c).to_pylist() for c in PARTITION_COLUMNS)):
+        counts[key] = counts.get(key, 0) + 1
+    return sorted(counts.items(), key=lambda kv: -kv[1])
+
+
+def main():
+    if pa is None:
+        sys.exit("pyarrow is not installed.")
+
+    ap = argparse.ArgumentParser(description="Columnar store + count queries for the InvalidXxx exports.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="Build/refresh the store from the CSV exports")
+    b.add_argument("--force", action="store_true", help="Rebuild even if the sources are unchanged")
+
+    c = sub.add_parser("counts", help="Row counts grouped by a column")
+    c.add_argument("--by", required=True, choices=["MatchField", "MeasuringAgency", "PointID", "DataSource"])
+    c.add_argument("--dataset", choices=list(SOURCES), help="Default: every built dataset")
+    c.add_argument("--table", help="Only this NMAquiferTable (e.g. dbo.WaterLevels)")
+    c.add_argument("--match-field", help="Only this MatchField")
+    c.add_argument("--point-id", help="Only this PointID")
+    c.add_argument("--top", type=int, default=20, help="Show the N largest groups (0 = all)")
+
+    p = sub.add_parser("point", help="Invalid rows per table/MatchField for one PointID")
+    p.add_argument("point_id")
+
+    args = ap.parse_args()
+    try:
+        if args.command == "build":
+            build_store(args.force)
+        elif args.command == "counts":
+            cmd_counts(args)
+        else:
+            cmd_point(args)
+    except ValueError as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
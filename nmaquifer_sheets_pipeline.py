@@ -51,6 +51,7 @@ What it does, in one run:
    - Columns: Old Table Names
    - Rows: Old Column Names for each table
    - Each cell text: "FieldName (Status)" where Status = Does field exist in Ocotillo?.
+   - Header cells: "TableName (NN% migrated)" = share of the table's fields with status "yes".
 
 5. Adds conditional formatting rules on the "Matrix" tab:
    - If cell text CONTAINS "(yes)"  -> green
@@ -59,18 +60,32 @@ What it does, in one run:
    - (Anything else will be uncolored by default, but you can add a red rule later.)
 
 Once the rules are there, they keep applying to new data each time you run this.
+
+6. Incremental mode (INCREMENTAL = True):
+   - Stores a per-table fingerprint (hash of the mapping tab values + the CSV
+     column list) in STATE_PATH.
+   - Only tables whose fingerprint changed are re-matched; the rest are taken
+     from the previous local outputs (mapping_report_*.csv, stats JSON,
+     visual_matrix_for_sheets.csv).
+   - Only the changed row ranges of Matched/Unmatched and the changed Matrix
+     columns are pushed. Without a previous state, a full run is done.
 """
 
 import re
 import json
+import hashlib
 import sys
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from column_layout import grouped_column_frame
+from sheets_batch import SheetsBatchWriter, SpreadsheetMetadataCache, batch_get_values, col_index_to_letter
+
 # ==========================
 # CONFIGURATION - EDIT THIS
 # ==========================
@@ -95,6 +110,35 @@ MATRIX_SHEET_NAME = "Matrix"
 # Apply conditional formatting rules on Matrix sheet?
 APPLY_CONDITIONAL_FORMATTING = True
 
+# Incremental mode: only recompute tables whose mapping tab / CSV columns
+# changed since the last run and only push the affected rows/columns.
+INCREMENTAL = False
+STATE_PATH = "mapping_report_state.json"
+
+# Local outputs (also the "previous outputs" for incremental mode)
+MATCHED_CSV_PATH = "mapping_report_matched.csv"
+UNMATCHED_CSV_PATH = "mapping_report_unmatched.csv"
+STATS_JSON_PATH = "mapping_report_stats.json"
+MATRIX_CSV_PATH = "visual_matrix_for_sheets.csv"
+
+MATCHED_COLUMNS = [
+    "Old Table Name",
+    "Old Column Name",
+    "NMAquifer Field Name",
+    "Ocotillo Table Name",
+    "Ocotillo Field Name",
+    "Does field exist in Ocotillo?",
+    "Note"
+]
+UNMATCHED_COLUMNS = [
+    "Old Table Name",
+    "Old Column Name",
+    "Reason"
+]
+
+# Matrix legend status categories (anything that isn't yes/no/N/A is "other")
+STATUS_CATEGORIES = ["yes", "no", "N/A", "other"]
+
 # Required columns in each mapping sheet
 REQ_SHEET_COLS = [
     "NMAquifer Field Name",
@@ -145,6 +189,52 @@ def strip_prefix_case_insensitive(name: str, prefix: str) -> str:
     return name
 
 
+def categorize_status(status: pd.Series) -> pd.Series:
+    """
+    Vectorized status classification for "Does field exist in Ocotillo?":
+    yes / no / N/A (also "NA") / other, case-insensitive, surrounding spaces ignored.
+    Returns a Categorical series with STATUS_CATEGORIES as categories.
+    """
+    s = status.astype(object).where(status.notna(), "").astype(str).str.strip()
+    low = s.str.lower()
+    labels = np.select(
+        [low == "yes", low == "no", s.str.upper().isin(["N/A", "NA"])],
+        ["yes", "no", "N/A"],
+        default="other",
+    )
+    return pd.Series(pd.Categorical(labels, categories=STATUS_CATEGORIES), index=status.index)
+
+
+def tally_status(status: pd.Series, tables: pd.Series) -> Tuple[Dict[str, int], pd.DataFrame]:
+    """
+    Count status categories overall and per table in one groupby.
+    Returns (counts {category: n}, per-table DataFrame indexed by table with
+    one column per category). Rows with a missing table only count overall.
+    """
+    cats = categorize_status(status)
+    per_table = (
+        pd.DataFrame({"table": tables.to_numpy(), "status": cats.to_numpy()})
+        .groupby(["table", "status"], dropna=False, observed=False)
+        .size()
+        .unstack("status", fill_value=0)
+        .reindex(columns=STATUS_CATEGORIES, fill_value=0)
+    )
+    counts = {c: int(per_table[c].sum()) for c in STATUS_CATEGORIES}
+    per_table = per_table[per_table.index.notna()]
+    return counts, per_table
+
+
+def matrix_header_labels(tables: List[str], per_table: pd.DataFrame) -> List[str]:
+    """Matrix header text: "Table (NN% migrated)" from the per-table status counts."""
+    totals = per_table.sum(axis=1)
+    migrated = (100.0 * per_table["yes"] / totals.where(totals > 0)).round(1)
+    labels = []
+    for t in tables:
+        p = migrated.get(t)
+        labels.append(t if p is None or pd.isna(p) else f"{t} ({p}% migrated)")
+    return labels
+
+
 def get_sheets_service():
     """Authenticate and return a Sheets API service client."""
     scopes = ["https://www.googleapis.com/auth/spreadsheets"]
@@ -156,69 +246,27 @@ def get_sheets_service():
     return service
 
 
-def get_spreadsheet_metadata(service):
-    """Fetch spreadsheet metadata (sheet titles & IDs)."""
-    spreadsheet = service.spreadsheets().get(
-        spreadsheetId=SPREADSHEET_ID
-    ).execute()
-    sheets = spreadsheet.get("sheets", [])
-    by_title = {
-        s["properties"]["title"]: s["properties"]
-        for s in sheets
-    }
-    return by_title
-
-
-def ensure_sheet(service, title: str) -> int:
-    """
-    Ensure a sheet with the given title exists.
-    Returns its sheetId.
-    """
-    meta = get_spreadsheet_metadata(service)
-    if title in meta:
-        return meta[title]["sheetId"]
-
-    # Add new sheet
-    body = {
-        "requests": [
-            {
-                "addSheet": {
-                    "properties": {
-                        "title": title
-                    }
-                }
-            }
-        ]
-    }
-    resp = service.spreadsheets().batchUpdate(
-        spreadsheetId=SPREADSHEET_ID,
-        body=body
-    ).execute()
-    sheet_id = resp["replies"][0]["addSheet"]["properties"]["sheetId"]
-    return sheet_id
-
-
-def read_mapping_sheets_to_dfs(service) -> Dict[str, pd.DataFrame]:
+def read_mapping_sheets_to_dfs(service, meta: SpreadsheetMetadataCache,
+                               raw_values: Optional[Dict[str, list]] = None) -> Dict[str, pd.DataFrame]:
     """
     Read all mapping sheets whose titles start with SHEET_PREFIX
     and return dict: old_table_name -> DataFrame
+    If raw_values is given, it is filled with old_table_name -> raw sheet values.
     """
-    meta = get_spreadsheet_metadata(service)
-    mapping_sheets = [title for title in meta.keys()
+    mapping_sheets = [title for title in meta.titles()
                       if title.lower().startswith(SHEET_PREFIX.lower())]
 
     sheets_dict: Dict[str, pd.DataFrame] = {}
 
-    for sheet_title in mapping_sheets:
+    # Read A:Z of every mapping tab (adjust if you have more columns) with
+    # values().batchGet instead of one values().get per tab
+    ranges = [f"'{title}'!A:Z" for title in mapping_sheets]
+    all_values, api_calls = batch_get_values(service, SPREADSHEET_ID, ranges)
+    print(f"Loaded {len(mapping_sheets)} mapping tab(s) in {api_calls} values().batchGet call(s).")
+
+    for sheet_title, values in zip(mapping_sheets, all_values):
         # old table name is sheet_title with prefix stripped
         old_table = strip_prefix_case_insensitive(sheet_title, SHEET_PREFIX)
-        # Read A:Z range (adjust if you have more columns)
-        range_a1 = f"'{sheet_title}'!A:Z"
-        resp = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=range_a1
-        ).execute()
-        values = resp.get("values", [])
         if not values:
             df = pd.DataFrame()
         else:
@@ -247,10 +295,198 @@ def read_mapping_sheets_to_dfs(service) -> Dict[str, pd.DataFrame]:
         df["__key__"] = df["NMAquifer Field Name"].map(make_key)
 
         sheets_dict[normalize_name(old_table)] = df
+        if raw_values is not None:
+            raw_values[normalize_name(old_table)] = values
 
     return sheets_dict
 
 
+def match_table(old_table: str, old_cols: List[str], sheet_df: Optional[pd.DataFrame]):
+    """
+    Match one old table's columns against its mapping sheet.
+    Returns (matched_rows, unmatched_rows, stats_entry).
+    """
+    matched_rows = []
+    unmatched_rows = []
+    sheet_rows = len(sheet_df) if sheet_df is not None else 0
+
+    if sheet_df is None:
+        for old_col in old_cols:
+            unmatched_rows.append({
+                "Old Table Name": old_table,
+                "Old Column Name": old_col,
+                "Reason": "No corresponding sheet (expected 'NMAquifer_{old table name}')"
+            })
+        return matched_rows, unmatched_rows, {
+            "csv_cols": len(old_cols),
+            "sheet_rows": sheet_rows,
+            "matched": 0,
+            "unmatched": len(unmatched_rows),
+            "has_sheet": False,
+        }
+
+    # Build lookup from normalized key to full row dict
+    lookup = {k: rec for k, rec in zip(
+        sheet_df["__key__"],
+        sheet_df.to_dict(orient="records")
+    )}
+
+    for old_col in old_cols:
+        key = make_key(old_col)
+        rec = lookup.get(key)
+        if rec is None:
+            unmatched_rows.append({
+                "Old Table Name": old_table,
+                "Old Column Name": old_col,
+                "Reason": "No matching 'NMAquifer Field Name' (after normalization)"
+            })
+            continue
+
+        nmaq = normalize_name(rec.get("NMAquifer Field Name"))
+        o_tab = normalize_name(rec.get("Ocotillo Table Name"))
+        o_col = normalize_name(rec.get("Ocotillo Field Name"))
+        field_exists = normalize_name(rec.get("Does field exist in Ocotillo?"))
+        note = normalize_name(rec.get("Note"))
+
+        matched_rows.append({
+            "Old Table Name": old_table,
+            "Old Column Name": old_col,
+            "NMAquifer Field Name": nmaq,
+            "Ocotillo Table Name": o_tab,
+            "Ocotillo Field Name": o_col,
+            "Does field exist in Ocotillo?": field_exists,
+            "Note": note
+        })
+
+    return matched_rows, unmatched_rows, {
+        "csv_cols": len(old_cols),
+        "sheet_rows": sheet_rows,
+        "matched": len(matched_rows),
+        "unmatched": len(unmatched_rows),
+        "has_sheet": True,
+    }
+
+
+# ==========================
+# INCREMENTAL MODE HELPERS
+# ==========================
+
+def table_fingerprint(old_cols: List[str], sheet_values: Optional[list]) -> str:
+    """Hash of the CSV column list + raw mapping tab values (None = no tab)."""
+    payload = json.dumps({"cols": old_cols, "sheet": sheet_values}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_state() -> Dict[str, Any]:
+    path = Path(STATE_PATH)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(fingerprints: Dict[str, str]):
+    with open(STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"tables": fingerprints}, f, indent=2)
+
+
+def load_previous_outputs():
+    """
+    Previous run's local outputs: (df_matched, df_unmatched, stats, df_matrix),
+    or None if any of them is missing/unreadable.
+    """
+    paths = [MATCHED_CSV_PATH, UNMATCHED_CSV_PATH, STATS_JSON_PATH, MATRIX_CSV_PATH]
+    if not all(Path(p).exists() for p in paths):
+        return None
+    try:
+        read = lambda p: pd.read_csv(p, dtype=str, keep_default_na=False)
+        df_m = read(MATCHED_CSV_PATH)
+        df_u = read(UNMATCHED_CSV_PATH)
+        df_x = read(MATRIX_CSV_PATH)
+        with open(STATS_JSON_PATH, "r", encoding="utf-8") as f:
+            stats = json.load(f)
+    except (OSError, ValueError, pd.errors.EmptyDataError):
+        return None
+    if list(df_m.columns) != MATCHED_COLUMNS or list(df_u.columns) != UNMATCHED_COLUMNS:
+        return None
+    return df_m, df_u, stats, df_x
+
+
+def records_by_table(df: pd.DataFrame) -> Dict[str, List[dict]]:
+    if df.empty:
+        return {}
+    return {
+        table: g.to_dict(orient="records")
+        for table, g in df.groupby("Old Table Name", sort=False)
+    }
+
+
+def changed_row_spans(old_rows: list, new_rows: list) -> List[Tuple[int, int]]:
+    """[start, stop) index spans where old_rows and new_rows differ (missing rows count as different)."""
+    spans = []
+    start = None
+    for i in range(max(len(old_rows), len(new_rows))):
+        o = old_rows[i] if i < len(old_rows) else None
+        n = new_rows[i] if i < len(new_rows) else None
+        if o != n:
+            if start is None:
+                start = i
+        elif start is not None:
+            spans.append((start, i))
+            start = None
+    if start is not None:
+        spans.append((start, max(len(old_rows), len(new_rows))))
+    return spans
+
+
+def queue_changed_rows(writer: SheetsBatchWriter, sheet_title: str,
+                       old_df: pd.DataFrame, new_df: pd.DataFrame) -> int:
+    """Queue only the changed row ranges of a tab (rows past the new end are blanked)."""
+    old_vals = df_to_values(old_df)
+    new_vals = df_to_values(new_df)
+    width = max([len(r) for r in old_vals + new_vals] or [0])
+    pushed = 0
+    for start, stop in changed_row_spans(old_vals, new_vals):
+        block = [
+            new_vals[i] if i < len(new_vals) else [""] * width
+            for i in range(start, stop)
+        ]
+        writer.write(f"'{sheet_title}'!A{start + 1}", block)
+        pushed += len(block)
+    return pushed
+
+
+def queue_changed_matrix_columns(writer: SheetsBatchWriter, old_matrix: pd.DataFrame,
+                                 new_matrix: pd.DataFrame,
+                                 header_labels: Optional[List[str]] = None) -> List[int]:
+    """
+    Queue only the Matrix columns (header at row 6) whose content changed.
+    header_labels (one per new column) replace the table names in the
+    written header cells. Returns the changed column indexes.
+    """
+    def columns(df):
+        return [[str(c)] + df[c].fillna("").tolist() for c in df.columns]
+
+    old_cols = columns(old_matrix)
+    new_cols = columns(new_matrix)
+    height = max([len(c) for c in old_cols + new_cols] or [0])
+    changed = []
+    for j in range(max(len(old_cols), len(new_cols))):
+        o = old_cols[j] if j < len(old_cols) else []
+        n = new_cols[j] if j < len(new_cols) else []
+        o = o + [""] * (height - len(o))
+        n = n + [""] * (height - len(n))
+        if o != n:
+            if header_labels is not None and j < len(header_labels):
+                n = [header_labels[j]] + n[1:]
+            writer.write(f"'{MATRIX_SHEET_NAME}'!{col_index_to_letter(j)}6", [[v] for v in n])
+            changed.append(j)
+    return changed
+
+
 def df_to_values(df: pd.DataFrame):
     """Convert a DataFrame to a Sheets-compatible 2D list (including header)."""
     if df is None or df.empty:
@@ -260,27 +496,20 @@ def df_to_values(df: pd.DataFrame):
     return [df.columns.tolist()] + df.values.tolist()
 
 
-def write_df_to_sheet(service, df: pd.DataFrame, sheet_title: str):
-    """Clear sheet and write DataFrame values to it."""
-    ensure_sheet(service, sheet_title)
+def write_df_to_sheet(writer: SheetsBatchWriter, meta: SpreadsheetMetadataCache,
+                      df: pd.DataFrame, sheet_title: str):
+    """Queue a clear of the sheet and a write of the DataFrame values (sent on writer.flush())."""
+    meta.ensure_sheet(sheet_title)
     values = df_to_values(df)
     # Clear existing content
-    service.spreadsheets().values().clear(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{sheet_title}'!A:Z"
-    ).execute()
+    writer.clear(f"'{sheet_title}'!A:Z")
     if not values:
         return
     # Write new values
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{sheet_title}'!A1",
-        valueInputOption="RAW",
-        body={"values": values}
-    ).execute()
+    writer.write(f"'{sheet_title}'!A1", values)
 
 
-def add_conditional_formatting_for_matrix(service, sheet_id: int):
+def add_conditional_formatting_for_matrix(writer: SheetsBatchWriter, sheet_id: int):
     """
     Add conditional formatting rules to the Matrix sheet:
       - "(yes)"  -> green
@@ -390,17 +619,18 @@ def add_conditional_formatting_for_matrix(service, sheet_id: int):
         }
     })
 
-    service.spreadsheets().batchUpdate(
-        spreadsheetId=SPREADSHEET_ID,
-        body={"requests": requests}
-    ).execute()
+    writer.add_requests(requests)
 
 
-def format_matrix_headers(service, sheet_id: int, headers, stats):
+def format_matrix_headers(writer: SheetsBatchWriter, sheet_id: int, headers, stats,
+                          only_columns: Optional[Iterable[int]] = None):
     """
     Color Matrix header row (row 5 / index 4):
       - Green if table has a mapping sheet (has_sheet=True)
       - Light red if it doesn't.
+    only_columns restricts the formatting to those column indexes; any of
+    them past the last header (tables that dropped out of the Matrix) have
+    their header formatting cleared.
     """
     def rgb(r, g, b):
         return {
@@ -409,8 +639,11 @@ def format_matrix_headers(service, sheet_id: int, headers, stats):
             "blue": b / 255.0,
         }
 
+    only = set(only_columns) if only_columns is not None else None
     requests = []
     for col_index, table_name in enumerate(headers):
+        if only is not None and col_index not in only:
+            continue
         has_sheet = stats.get(table_name, {}).get("has_sheet", False)
         color = rgb(0, 200, 0) if has_sheet else rgb(255, 200, 200)  # green vs light red
 
@@ -433,11 +666,23 @@ def format_matrix_headers(service, sheet_id: int, headers, stats):
             }
         })
 
-    if requests:
-        service.spreadsheets().batchUpdate(
-            spreadsheetId=SPREADSHEET_ID,
-            body={"requests": requests}
-        ).execute()
+    removed = sorted(c for c in only if c >= len(headers)) if only is not None else []
+    if removed:
+        requests.append({
+            "repeatCell": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": 5,
+                    "endRowIndex": 6,
+                    "startColumnIndex": removed[0],
+                    "endColumnIndex": removed[-1] + 1,
+                },
+                "cell": {"userEnteredFormat": {}},
+                "fields": "userEnteredFormat(backgroundColor,textFormat)"
+            }
+        })
+
+    writer.add_requests(requests)
 
 
 
@@ -460,119 +705,84 @@ def main():
     if "table_name" not in df_csv.columns or "columns" not in df_csv.columns:
         sys.exit("CSV must contain 'table_name' and 'columns' columns.")
 
-    # Connect to Sheets
+    # Connect to Sheets; all writes/formatting are queued and sent in one flush
     service = get_sheets_service()
-
-    # Load mapping sheets into DataFrames
-    sheets_dict = read_mapping_sheets_to_dfs(service)
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+    # Sheet titles/IDs are fetched once and reused for the whole run
+    meta = SpreadsheetMetadataCache(service, SPREADSHEET_ID)
+
+    # Load mapping sheets into DataFrames (raw values kept for fingerprints)
+    raw_values: Dict[str, list] = {}
+    sheets_dict = read_mapping_sheets_to_dfs(service, meta, raw_values)
+
+    # Incremental mode needs both the saved fingerprints and the previous outputs
+    prev_fps: Dict[str, str] = {}
+    previous = None
+    if INCREMENTAL:
+        prev_fps = load_state().get("tables", {})
+        previous = load_previous_outputs() if prev_fps else None
+        if previous is None:
+            print("Incremental: no usable previous state; doing a full run.")
+    incremental = previous is not None
+    if incremental:
+        prev_matched, prev_unmatched, prev_stats, prev_matrix = previous
+        prev_m_by_table = records_by_table(prev_matched)
+        prev_u_by_table = records_by_table(prev_unmatched)
 
     matched_rows = []
     unmatched_rows = []
     stats = {}
+    fingerprints: Dict[str, str] = {}
+    recomputed = []
 
     # Iterate tables from CSV; match to sheet named NMAquifer_{table_name}
     for _, row in df_csv.iterrows():
         old_table = normalize_name(row.get("table_name"))
         old_cols = split_columns_cell(row.get("columns"))
-        sheet_df = sheets_dict.get(old_table)
-        matched_count = 0
-        unmatched_count = 0
-        sheet_rows = len(sheet_df) if sheet_df is not None else 0
-
-        if sheet_df is None:
-            for old_col in old_cols:
-                unmatched_rows.append({
-                    "Old Table Name": old_table,
-                    "Old Column Name": old_col,
-                    "Reason": "No corresponding sheet (expected 'NMAquifer_{old table name}')"
-                })
-                unmatched_count += 1
-            stats[old_table] = {
-                "csv_cols": len(old_cols),
-                "sheet_rows": sheet_rows,
-                "matched": matched_count,
-                "unmatched": unmatched_count,
-                "has_sheet": False,
-            }
+        fp = table_fingerprint(old_cols, raw_values.get(old_table))
+        fingerprints[old_table] = fp
+
+        if incremental and prev_fps.get(old_table) == fp and old_table in prev_stats:
+            # Unchanged since last run: reuse the previous rows/stats
+            matched_rows.extend(prev_m_by_table.get(old_table, []))
+            unmatched_rows.extend(prev_u_by_table.get(old_table, []))
+            stats[old_table] = prev_stats[old_table]
             continue
 
-        # Build lookup from normalized key to full row dict
-        lookup = {k: rec for k, rec in zip(
-            sheet_df["__key__"],
-            sheet_df.to_dict(orient="records")
-        )}
+        m_rows, u_rows, stats[old_table] = match_table(old_table, old_cols, sheets_dict.get(old_table))
+        matched_rows.extend(m_rows)
+        unmatched_rows.extend(u_rows)
+        recomputed.append(old_table)
 
-        for old_col in old_cols:
-            key = make_key(old_col)
-            rec = lookup.get(key)
-            if rec is None:
-                unmatched_rows.append({
-                    "Old Table Name": old_table,
-                    "Old Column Name": old_col,
-                    "Reason": "No matching 'NMAquifer Field Name' (after normalization)"
-                })
-                unmatched_count += 1
-                continue
-
-            nmaq = normalize_name(rec.get("NMAquifer Field Name"))
-            o_tab = normalize_name(rec.get("Ocotillo Table Name"))
-            o_col = normalize_name(rec.get("Ocotillo Field Name"))
-            field_exists = normalize_name(rec.get("Does field exist in Ocotillo?"))
-            note = normalize_name(rec.get("Note"))
-
-            matched_rows.append({
-                "Old Table Name": old_table,
-                "Old Column Name": old_col,
-                "NMAquifer Field Name": nmaq,
-                "Ocotillo Table Name": o_tab,
-                "Ocotillo Field Name": o_col,
-                "Does field exist in Ocotillo?": field_exists,
-                "Note": note
-            })
-            matched_count += 1
-
-        stats[old_table] = {
-            "csv_cols": len(old_cols),
-            "sheet_rows": sheet_rows,
-            "matched": matched_count,
-            "unmatched": unmatched_count,
-            "has_sheet": True,
-        }
+    if incremental:
+        print(f"Incremental: recomputed {len(recomputed)} of {len(fingerprints)} table(s).")
 
     # Build DataFrames
-    df_matched = pd.DataFrame(matched_rows, columns=[
-        "Old Table Name",
-        "Old Column Name",
-        "NMAquifer Field Name",
-        "Ocotillo Table Name",
-        "Ocotillo Field Name",
-        "Does field exist in Ocotillo?",
-        "Note"
-    ])
-    df_unmatched = pd.DataFrame(unmatched_rows, columns=[
-        "Old Table Name",
-        "Old Column Name",
-        "Reason"
-    ])
+    df_matched = pd.DataFrame(matched_rows, columns=MATCHED_COLUMNS)
+    df_unmatched = pd.DataFrame(unmatched_rows, columns=UNMATCHED_COLUMNS)
 
     # Optional: also save locally as CSV
-    df_matched.to_csv("mapping_report_matched.csv", index=False)
-    df_unmatched.to_csv("mapping_report_unmatched.csv", index=False)
-
-    # Write to Sheets
-    write_df_to_sheet(service, df_matched, MATCHED_SHEET_NAME)
-    write_df_to_sheet(service, df_unmatched, UNMATCHED_SHEET_NAME)
+    df_matched.to_csv(MATCHED_CSV_PATH, index=False)
+    df_unmatched.to_csv(UNMATCHED_CSV_PATH, index=False)
+
+    # Write to Sheets (incremental: only the row ranges that changed)
+    if incremental:
+        meta.ensure_sheet(MATCHED_SHEET_NAME)
+        meta.ensure_sheet(UNMATCHED_SHEET_NAME)
+        n_m = queue_changed_rows(writer, MATCHED_SHEET_NAME, prev_matched, df_matched)
+        n_u = queue_changed_rows(writer, UNMATCHED_SHEET_NAME, prev_unmatched, df_unmatched)
+        print(f"Incremental: pushing {n_m} Matched row(s), {n_u} Unmatched row(s).")
+    else:
+        write_df_to_sheet(writer, meta, df_matched, MATCHED_SHEET_NAME)
+        write_df_to_sheet(writer, meta, df_unmatched, UNMATCHED_SHEET_NAME)
 
     # Stats JSON (local file)
-    with open("mapping_report_stats.json", "w", encoding="utf-8") as f:
+    with open(STATS_JSON_PATH, "w", encoding="utf-8") as f:
         json.dump(stats, f, indent=2)
 
     # Build Matrix sheet: columns = Old Table Names, rows = fields for each table
     # Include BOTH matched and unmatched entries.
 
-    matrix_cols = {}
-    max_len = 0
-
     # Get all tables that appear anywhere
     all_tables = set()
     if not df_matched.empty:
@@ -588,52 +798,25 @@ def main():
 
     ordered_tables = sorted(all_tables, key=table_sort_key)
 
-    for table in ordered_tables:
-        rows = []
-
-        # Matched rows: use actual status text
-        if not df_matched.empty:
-            g_m = df_matched[df_matched["Old Table Name"] == table]
-            for _, r in g_m.iterrows():
-                rows.append(
-                    f"{r['Old Column Name']} ({r['Does field exist in Ocotillo?']})"
-                )
-
-        # Unmatched rows: label explicitly as unmatched
-        if not df_unmatched.empty:
-            g_u = df_unmatched[df_unmatched["Old Table Name"] == table]
-            for _, r in g_u.iterrows():
-                rows.append(
-                    f"{r['Old Column Name']} (pending)"
-                )
-
-        matrix_cols[table] = rows
-        if rows:
-            max_len = max(max_len, len(rows))
+    # Matched rows use the actual status text; unmatched rows are labelled
+    # explicitly as pending. Matched cells come first within each table.
+    matrix_keys = pd.concat([df_matched["Old Table Name"], df_unmatched["Old Table Name"]],
+                            ignore_index=True)
+    matrix_cells = pd.concat([
+        df_matched["Old Column Name"].astype(str)
+        + " (" + df_matched["Does field exist in Ocotillo?"].astype(str) + ")",
+        df_unmatched["Old Column Name"].astype(str) + " (pending)",
+    ], ignore_index=True)
 
     # ---------------------------------------
-    # Compute status counts for legend (%)
+    # Status counts for the legend (%) and per-table coverage for the header;
+    # unmatched rows are always "other"
     # ---------------------------------------
-    status_counts = {"yes": 0, "no": 0, "N/A": 0, "other": 0}
-
-    # From matched rows
-    if not df_matched.empty:
-        for _, r in df_matched.iterrows():
-            val = normalize_name(r.get("Does field exist in Ocotillo?"))
-            low = val.lower()
-            if low == "yes":
-                status_counts["yes"] += 1
-            elif low == "no":
-                status_counts["no"] += 1
-            elif val.upper() in ("N/A", "NA"):
-                status_counts["N/A"] += 1
-            else:
-                status_counts["other"] += 1
-
-    # From unmatched rows: always "other"
-    if not df_unmatched.empty:
-        # each unmatched row is a field that didn't map
-        status_counts["other"] += len(df_unmatched)
+    status_counts, status_by_table = tally_status(
+        pd.concat([df_matched["Does field exist in Ocotillo?"],
+                   pd.Series(["pending"] * len(df_unmatched), dtype=object)], ignore_index=True),
+        matrix_keys,
+    )
 
     total_fields = sum(status_counts.values()) or 1  # avoid divide-by-zero
 
@@ -642,20 +825,16 @@ def main():
 
 
     # Build matrix DataFrame and write to Sheets (starting at A6)
-    if matrix_cols:
-        # pad shorter columns
-        for table, rows in matrix_cols.items():
-            if len(rows) < max_len:
-                rows.extend([""] * (max_len - len(rows)))
-        df_matrix = pd.DataFrame(matrix_cols)
-        df_matrix.to_csv("visual_matrix_for_sheets.csv", index=False)  # optional local
-
-        # Ensure sheet exists & wipe it
-        matrix_sheet_id = ensure_sheet(service, MATRIX_SHEET_NAME)
-        service.spreadsheets().values().clear(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{MATRIX_SHEET_NAME}'!A:Z"
-        ).execute()
+    if ordered_tables:
+        # one column per table, padded with ""
+        df_matrix = grouped_column_frame(matrix_keys, matrix_cells, ordered_tables)
+        df_matrix.to_csv(MATRIX_CSV_PATH, index=False)  # optional local
+        header_labels = matrix_header_labels(ordered_tables, status_by_table)
+
+        # Ensure sheet exists & wipe it (incremental: keep it, rewrite changed columns only)
+        matrix_sheet_id = meta.ensure_sheet(MATRIX_SHEET_NAME)
+        if not incremental:
+            writer.clear(f"'{MATRIX_SHEET_NAME}'!A:Z")
 
         # Write legend in rows 1–5, with percentages in column C
         legend_values = [
@@ -674,35 +853,37 @@ def main():
              f"{pct(status_counts['other'])}% ({status_counts['other']}/{total_fields})"],
         ]
 
-        service.spreadsheets().values().update(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{MATRIX_SHEET_NAME}'!A1",
-            valueInputOption="RAW",
-            body={"values": legend_values}
-        ).execute()
-
-        # Now write matrix starting at A6
-        matrix_values = df_to_values(df_matrix)  # header + data
-        service.spreadsheets().values().update(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{MATRIX_SHEET_NAME}'!A6",
-            valueInputOption="RAW",
-            body={"values": matrix_values}
-        ).execute()
-
-        if APPLY_CONDITIONAL_FORMATTING:
-            add_conditional_formatting_for_matrix(service, matrix_sheet_id)
-            format_matrix_headers(service, matrix_sheet_id, df_matrix.columns.tolist(), stats)
+        writer.write(f"'{MATRIX_SHEET_NAME}'!A1", legend_values)
 
-    else:
-        print("No data for Matrix sheet.")
+        if incremental:
+            # Only the Matrix columns that changed; the conditional formatting
+            # rules are already on the sheet from the first (full) run
+            changed_cols = queue_changed_matrix_columns(writer, prev_matrix, df_matrix, header_labels)
+            print(f"Incremental: pushing {len(changed_cols)} Matrix column(s).")
+            if APPLY_CONDITIONAL_FORMATTING:
+                format_matrix_headers(writer, matrix_sheet_id, df_matrix.columns.tolist(), stats,
+                                      only_columns=changed_cols)
+        else:
+            # Now write matrix starting at A6
+            matrix_values = df_to_values(df_matrix)  # header + data
+            matrix_values[0] = header_labels
+            writer.write(f"'{MATRIX_SHEET_NAME}'!A6", matrix_values)
 
+            if APPLY_CONDITIONAL_FORMATTING:
+                add_conditional_formatting_for_matrix(writer, matrix_sheet_id)
+                format_matrix_headers(writer, matrix_sheet_id, df_matrix.columns.tolist(), stats)
 
+    else:
+        print("No data for Matrix sheet.")
 
+    calls = writer.flush()
+    save_state(fingerprints)
+    print(f"✓ Sheets writes sent in {sum(calls.values())} call(s): {calls}")
+    print(f"✓ Metadata cache: {meta.stats()}")
     print(f"✓ Matched rows:   {len(df_matched)}")
     print(f"✓ Unmatched rows: {len(df_unmatched)}")
     print("✓ Sheets updated: Matched, Unmatched, Matrix")
-    print("✓ Local files written: mapping_report_matched.csv, mapping_report_unmatched.csv, mapping_report_stats.json, visual_matrix_for_sheets.csv")
+    print(f"✓ Local files written: {MATCHED_CSV_PATH}, {UNMATCHED_CSV_PATH}, {STATS_JSON_PATH}, {MATRIX_CSV_PATH}")
 
 
 if __name__ == "__main__":
@@ -18,6 +18,8 @@ import pandas as pd
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from sheets_batch import SheetsBatchWriter
+
 # =============== CONFIG =================
 
 SERVICE_ACCOUNT_FILE = "service_account.json"
@@ -129,12 +131,8 @@ def main():
     num_rows = len(values)  # includes header
     col_values = [[EXISTS_COL_NAME]] + [[v] for v in exists_values]
 
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{FIELDPAIRS_SHEET_NAME}'!{col_letter}1:{col_letter}{num_rows}",
-        valueInputOption="RAW",
-        body={"values": col_values}
-    ).execute()
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+    writer.write(f"'{FIELDPAIRS_SHEET_NAME}'!{col_letter}1:{col_letter}{num_rows}", col_values)
 
     # --- Stats (excluding N/A) and summary to E1 ---
     # Use exists_values directly (no DataFrame)
@@ -155,12 +153,10 @@ def main():
         ["blank", int(blank_c), f"{pct(blank_c)}%"],
     ]
 
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{FIELDPAIRS_SHEET_NAME}'!H1:J5",
-        valueInputOption="RAW",
-        body={"values": summary_values}
-    ).execute()
+    writer.write(f"'{FIELDPAIRS_SHEET_NAME}'!H1:J5", summary_values)
+
+    # Exists column + summary go out in a single values().batchUpdate
+    writer.flush()
 
     print(
         f"✓ Updated {EXISTS_COL_NAME} in '{FIELDPAIRS_SHEET_NAME}' "
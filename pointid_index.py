@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PointID index across the invalid-data exports and the transfer metrics files.
+
+For every PointID the index stores where its records are:
+  (file, byte offset, byte length, row count)
+one span per run of consecutive records, so a lookup is a seek + read per span
+instead of a scan of 100+ MB of CSVs.
+
+The index is a small SQLite file (INDEX_PATH). Rebuilding is incremental:
+only files whose size or mtime changed since the last build are re-read;
+files that disappeared are dropped from the index.
+
+Sources:
+  - CSV_SOURCES: comma CSVs with a PointID (or SamplePointID) column;
+    quoted fields with embedded newlines are handled
+  - METRICS_PATTERNS: pipe-delimited transfer metrics files, tokenized with
+    transfer_metrics_io (data rows only)
+
+Usage:
+  python pointid_index.py build
+  python pointid_index.py lookup NM-23324 [--raw]
+
+API:
+  build_index() -> {"indexed": [...], "unchanged": [...], "removed": [...]}
+  lookup("NM-23324") -> {file: [record dict, ...]}
+"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from transfer_metrics_io import REQUIRED_HEADERS, iter_detail_rows_with_offsets, split_point_row
+
+# ====== CONFIG ======
+INDEX_PATH = Path(".pointid_index.sqlite")
+
+CSV_SOURCES = [
+    "InvalidWaterLevels.csv",
+    "InvalidWellData_combined.csv",
+    "InvalidChemSampleInfo.csv",
+    "WLs_multiMeasAgencies.csv",
+]
+METRICS_PATTERNS = ["transfer_metrics*.csv"]
+
+# First of these found in a CSV header is its PointID column
+POINT_ID_COLUMNS = ["PointID", "SamplePointID"]
+# ====================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path    TEXT UNIQUE NOT NULL,
+    kind    TEXT NOT NULL,          -- csv | metrics
+    size    INTEGER NOT NULL,
+    mtime   REAL NOT NULL,
+    header  TEXT,                   -- JSON column list (csv)
+    records INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS spans (
+    point_id TEXT NOT NULL COLLATE NOCASE,
+    file_id  INTEGER NOT NULL REFERENCES files(file_id),
+    offset   INTEGER NOT NULL,
+    nbytes   INTEGER NOT NULL,
+    rows     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_spans_point ON spans (point_id);
+CREATE INDEX IF NOT EXISTS ix_spans_file ON spans (file_id);
+"""
+
+
+def configured_files() -> List[Tuple[str, str]]:
+    """[(path, kind)] for the configured sources that exist."""
+    out = [(p, "csv") for p in CSV_SOURCES if Path(p).exists()]
+    for pattern in METRICS_PATTERNS:
+        out += [(p, "metrics") for p in sorted(glob.glob(pattern))]
+    return out
+
+
+def connect(index_path: Path = INDEX_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(index_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ---------- record scanners: (offset, nbytes, point_id) ----------
+
+def _csv_header(path: str) -> List[str]:
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), None) or []
+
+
+def iter_csv_records(path: str, point_col: int) -> Iterator[Tuple[int, int, str]]:
+    """
+    Byte span + PointID of every data record. A record ends at the first line
+    break with balanced double quotes, so quoted newlines stay in one record.
+    """
+    with open(path, "rb") as f:
+        offset = len(f.readline())  # header
+        start, parts, quotes = offset, [], 0
+        for raw in f:
+            parts.append(raw)
+            quotes += raw.count(b'"')
+            offset += len(raw)
+            if quotes % 2:
+                continue  # inside a quoted field
+            record = b"".join(parts) if len(parts) > 1 else raw
+            text = record.decode("utf-8", errors="replace")
+            if quotes:
+                fields = next(csv.reader([text]), [])
+            else:
+                fields = text.rstrip("\r\n").split(",")
+            pid = fields[point_col].strip() if point_col < len(fields) else ""
+            if text.strip():
+                yield start, offset - start, pid
+            start, parts, quotes = offset, [], 0
+
+
+def iter_metrics_records(path: str) -> Iterator[Tuple[int, int, str]]:
+    for off, nbytes, row in iter_detail_rows_with_offsets(Path(path)):
+        yield off, nbytes, row.point_id
+
+
+def coalesce_spans(records: Iterator[Tuple[int, int, str]]) -> Iterator[Tuple[str, int, int, int]]:
+    """Merge adjacent records of the same PointID into (point_id, offset, nbytes, rows)."""
+    cur = None
+    for off, nbytes, pid in records:
+        if not pid:
+            continue
+        if cur and cur[0] == pid and cur[1] + cur[2] == off:
+            cur[2] += nbytes
+            cur[3] += 1
+            continue
+        if cur:
+            yield tuple(cur)
+        cur = [pid, off, nbytes, 1]
+    if cur:
+        yield tuple(cur)
+
+
+# ---------- build ----------
+
+def index_file(conn: sqlite3.Connection, path: str, kind: str) -> int:
+    """(Re)index one file; returns the number of records indexed."""
+    st = Path(path).stat()
+    header = None
+    if kind == "csv":
+        header = _csv_header(path)
+        point_col = next((header.index(c) for c in POINT_ID_COLUMNS if c in header), None)
+        if point_col is None:
+            raise ValueError(f"{path}: no {' / '.join(POINT_ID_COLUMNS)} column")
+        records = iter_csv_records(path, point_col)
+    else:
+        records = iter_metrics_records(path)
+
+    remove_file(conn, path)
+    cur = conn.execute(
+        "INSERT INTO files (path, kind, size, mtime, header, records) VALUES (?, ?, ?, ?, ?, 0)",
+        (path, kind, st.st_size, st.st_mtime, json.dumps(header) if header else None),
+    )
+    file_id = cur.lastrowid
+    n = 0
+    batch = []
+    for pid, off, nbytes, rows in coalesce_spans(records):
+        batch.append((pid, file_id, off, nbytes, rows))
+        n += rows
+        if len(batch) >= 10_000:
+            conn.executemany("INSERT INTO spans VALUES (?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO spans VALUES (?, ?, ?, ?, ?)", batch)
+    conn.execute("UPDATE files SET records = ? WHERE file_id = ?", (n, file_id))
+    return n
+
+
+def remove_file(conn: sqlite3.Connection, path: str):
+    row = conn.execute("SELECT file_id FROM files WHERE path = ?", (path,)).fetchone()
+    if row:
+        conn.execute("DELETE FROM spans WHERE file_id = ?", row)
+        conn.execute("DELETE FROM files WHERE file_id = ?", row)
+
+
+def build_index(index_path: Path = INDEX_PATH) -> Dict[str, List[str]]:
+    """Incrementally (re)build the index; returns which files were indexed/unchanged/removed."""
+    conn = connect(index_path)
+    report = {"indexed": [], "unchanged": [], "removed": []}
+    try:
+        known = {
+            path: (size, mtime)
+            for path, size, mtime in conn.execute("SELECT path, size, mtime FROM files")
+        }
+        wanted = configured_files()
+        for path, kind in wanted:
+            st = Path(path).stat()
+            if known.get(path) == (st.st_size, st.st_mtime):
+                report["unchanged"].append(path)
+                continue
+            try:
+                n = index_file(conn, path, kind)
+            except ValueError as e:
+                print(f"[skip] {e}")
+                remove_file(conn, path)
+                continue
+            conn.commit()
+            report["indexed"].append(path)
+            print(f"[indexed] {path}: {n} records")
+
+        for path in set(known) - {p for p, _ in wanted}:
+            remove_file(conn, path)
+            report["removed"].append(path)
+        conn.commit()
+    finally:
+        conn.close()
+    return report
+
+
+# ---------- lookup ----------
+
+def _parse_span(kind: str, header, data: bytes) -> List[Dict[str, str]]:
+    text = data.decode("utf-8", errors="replace")
+    if kind == "csv":
+        return [dict(zip(header, row)) for row in csv.reader(io.StringIO(text, newline=""))]
+    return [
+        dict(zip(REQUIRED_HEADERS, split_point_row(line)))
+        for line in text.splitlines() if line.strip()
+    ]
+
+
+def lookup_spans(point_id: str, index_path: Path = INDEX_PATH):
+    """[(path, kind, header, offset, nbytes, rows)] for point_id, in file order."""
+    conn = connect(index_path)
+    try:
+        return [
+            (path, kind, json.loads(header) if header else None, off, nbytes, rows)
+            for path, kind, header, off, nbytes, rows in conn.execute(
+                """
+                SELECT f.path, f.kind, f.header, s.offset, s.nbytes, s.rows
+                FROM spans s JOIN files f ON f.file_id = s.file_id
+                WHERE s.point_id = ?
+                ORDER BY f.path, s.offset
+                """,
+                (point_id.strip(),),
+            )
+        ]
+    finally:
+        conn.close()
+
+
+def lookup(point_id: str, index_path: Path = INDEX_PATH, raw: bool = False) -> Dict[str, list]:
+    """
+    Every indexed record for point_id, read by seeking straight to its spans:
+    {file: [record dict, ...]} (or raw record text with raw=True).
+    """
+    out: Dict[str, list] = {}
+    handles = {}
+    try:
+        for path, kind, header, off, nbytes, rows in lookup_spans(point_id, index_path):
+            f = handles.get(path)
+            if f is None:
+                f = handles[path] = open(path, "rb")
+            f.seek(off)
+            data = f.read(nbytes)
+            if raw:
+                out.setdefault(path, []).append(data.decode("utf-8", errors="replace"))
+            else:
+                out.setdefault(path, []).extend(_parse_span(kind, header, data))
+    finally:
+        for f in handles.values():
+            f.close()
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="PointID index over the invalid-data and transfer metrics files.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="Build/refresh the index (only changed files are re-read)")
+    lk = sub.add_parser("lookup", help="Print every indexed record for a PointID")
+    lk.add_argument("point_id")
+    lk.add_argument("--raw", action="store_true", help="Print the raw lines instead of parsed records")
+    args = ap.parse_args()
+
+    if args.command == "build":
+        report = build_index()
+        print(f"Indexed {len(report['indexed'])}, unchanged {len(report['unchanged'])}, "
+              f"removed {len(report['removed'])} file(s) -> {INDEX_PATH}")
+        return
+
+    if not INDEX_PATH.exists():
+        sys.exit(f"No index at {INDEX_PATH} (run: python pointid_index.py build).")
+    found = lookup(args.point_id, raw=args.raw)
+    if not found:
+        print(f"No records for {args.point_id}.")
+        return
+    for path, records in found.items():
+        print(f"\n== {path}: {len(records)} {'span' if args.raw else 'record'}(s)")
+        for rec in records:
+            if args.raw:
+                print(rec.rstrip("\r\n"))
+            else:
+                print("  " + " | ".join(f"{k}={v}" for k, v in rec.items() if v))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Batched Google Sheets helpers shared by the reporting scripts.
+
+SheetsBatchWriter
+-----------------
+Instead of one values().clear() + values().update() round trip per tab, a run
+queues everything on a SheetsBatchWriter and flushes once:
+
+  1. all clears        -> values().batchClear
+  2. all value writes  -> values().batchUpdate
+  3. all format/other  -> spreadsheets().batchUpdate
+
+Each stage is split into several calls when its JSON payload would pass
+MAX_PAYLOAD_BYTES. A single large write (e.g. TableField_Issues) is split
+by rows into consecutive ranges, so no single request gets too big.
+
+Usage:
+  writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+  writer.clear("'Matched'!A:Z")
+  writer.write("'Matched'!A1", values)
+  writer.add_requests([...])          # e.g. addConditionalFormatRule
+  writer.flush()
+
+batch_get_values
+----------------
+Read many ranges with values().batchGet (MAX_RANGES_PER_BATCH_GET per call)
+instead of one values().get per range.
+
+SpreadsheetMetadataCache
+------------------------
+Per-run cache of sheet titles -> properties. The spreadsheet metadata is
+fetched once (spreadsheets().get) and kept current from addSheet replies;
+it is only refetched after invalidate(). hits/misses show the saved calls.
+
+  meta = SpreadsheetMetadataCache(service, SPREADSHEET_ID)
+  sheet_id = meta.ensure_sheet("Matrix")
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# values().batchGet is a GET request: ranges go in the URL, so keep each call
+# to a bounded number of ranges.
+MAX_RANGES_PER_BATCH_GET = 40
+
+# Google accepts larger bodies, but ~2 MB per request keeps calls fast and
+# well clear of the request size / timeout limits.
+MAX_PAYLOAD_BYTES = 2_000_000
+
+_a1_re = re.compile(r"^(?P<sheet>.+)!\$?(?P<col>[A-Za-z]+)\$?(?P<row>\d+)(?::.*)?$")
+
+
+def col_index_to_letter(idx: int) -> str:
+    """0-based column index -> A1 column letter(s)."""
+    idx += 1
+    letters = ""
+    while idx > 0:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def split_a1_start(a1_range: str) -> Tuple[str, str, int]:
+    """"'Tab'!B7" or "'Tab'!B7:F20" -> ("'Tab'", "B", 7)."""
+    m = _a1_re.match(a1_range)
+    if not m:
+        raise ValueError(f"Expected a range with a start cell like 'Tab'!A1, got: {a1_range}")
+    return m.group("sheet"), m.group("col").upper(), int(m.group("row"))
+
+
+def _json_len(obj: Any) -> int:
+    return len(json.dumps(obj, ensure_ascii=False))
+
+
+def batch_get_values(service, spreadsheet_id: str, ranges: List[str],
+                     max_ranges: int = MAX_RANGES_PER_BATCH_GET) -> Tuple[List[list], int]:
+    """
+    Fetch ranges with as few values().batchGet calls as possible.
+    Returns (values for each range in request order, number of API calls).
+    """
+    out: List[list] = []
+    calls = 0
+    for start in range(0, len(ranges), max_ranges):
+        group = ranges[start:start + max_ranges]
+        resp = service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=group,
+        ).execute()
+        calls += 1
+        value_ranges = resp.get("valueRanges", [])
+        # valueRanges come back in request order
+        for i in range(len(group)):
+            vr = value_ranges[i] if i < len(value_ranges) else {}
+            out.append(vr.get("values", []))
+    return out, calls
+
+
+class SheetsBatchWriter:
+    """Queue clears, value writes and format requests; send them in a few batched calls."""
+
+    def __init__(self, service, spreadsheet_id: str, value_input_option: str = "RAW",
+                 max_payload_bytes: int = MAX_PAYLOAD_BYTES):
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self.value_input_option = value_input_option
+        self.max_payload_bytes = max_payload_bytes
+        self._clears: List[str] = []
+        self._writes: List[Tuple[str, list]] = []
+        self._requests: List[Dict[str, Any]] = []
+        self.api_calls = 0
+
+    # ---------- queueing ----------
+
+    def clear(self, a1_range: str):
+        self._clears.append(a1_range)
+
+    def write(self, a1_range: str, values: list):
+        """Queue values starting at the range's top-left cell."""
+        if values:
+            self._writes.append((a1_range, values))
+
+    def add_requests(self, requests: List[Dict[str, Any]]):
+        self._requests.extend(requests)
+
+    def pending(self) -> bool:
+        return bool(self._clears or self._writes or self._requests)
+
+    # ---------- chunking ----------
+
+    def _chunks(self, items: List[Any]) -> List[List[Any]]:
+        """Group items so each group's JSON stays under max_payload_bytes."""
+        groups, cur, size = [], [], 0
+        for item in items:
+            n = _json_len(item) + 1
+            if cur and size + n > self.max_payload_bytes:
+                groups.append(cur)
+                cur, size = [], 0
+            cur.append(item)
+            size += n
+        if cur:
+            groups.append(cur)
+        return groups
+
+    def _value_ranges(self) -> List[Dict[str, Any]]:
+        """Split each queued write by rows into ranges under max_payload_bytes."""
+        out = []
+        for a1_range, values in self._writes:
+            sheet, col, row = split_a1_start(a1_range)
+            offset = 0
+            for rows in self._chunks(values):
+                out.append({"range": f"{sheet}!{col}{row + offset}", "values": rows})
+                offset += len(rows)
+        return out
+
+    # ---------- flushing ----------
+
+    def flush(self) -> Dict[str, int]:
+        """Send everything queued (clears, then values, then requests). Returns call counts."""
+        sheets = self.service.spreadsheets()
+        calls = {"batchClear": 0, "values.batchUpdate": 0, "batchUpdate": 0}
+
+        for ranges in self._chunks(self._clears):
+            sheets.values().batchClear(
+                spreadsheetId=self.spreadsheet_id,
+                body={"ranges": ranges},
+            ).execute()
+            calls["batchClear"] += 1
+
+        for data in self._chunks(self._value_ranges()):
+            sheets.values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={"valueInputOption": self.value_input_option, "data": data},
+            ).execute()
+            calls["values.batchUpdate"] += 1
+
+        for requests in self._chunks(self._requests):
+            sheets.batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={"requests": requests},
+            ).execute()
+            calls["batchUpdate"] += 1
+
+        self._clears, self._writes, self._requests = [], [], []
+        self.api_calls += sum(calls.values())
+        return calls
+
+
+class SpreadsheetMetadataCache:
+    """Sheet titles & IDs for one spreadsheet, fetched once per run."""
+
+    def __init__(self, service, spreadsheet_id: str):
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self._by_title: Optional[Dict[str, Dict[str, Any]]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        spreadsheet = self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields="sheets.properties",
+        ).execute()
+        self._by_title = {
+            s["properties"]["title"]: s["properties"]
+            for s in spreadsheet.get("sheets", [])
+        }
+
+    def sheets(self) -> Dict[str, Dict[str, Any]]:
+        """title -> sheet properties (fetches on first use / after invalidate())."""
+        if self._by_title is None:
+            self.misses += 1
+            self._load()
+        else:
+            self.hits += 1
+        return self._by_title
+
+    def titles(self) -> List[str]:
+        return list(self.sheets().keys())
+
+    def sheet_id(self, title: str) -> Optional[int]:
+        props = self.sheets().get(title)
+        return props["sheetId"] if props else None
+
+    def ensure_sheet(self, title: str) -> int:
+        """Return the sheetId for title, adding the sheet if it doesn't exist yet."""
+        props = self.sheets().get(title)
+        if props:
+            return props["sheetId"]
+
+        resp = self.service.spreadsheets().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={"requests": [{"addSheet": {"properties": {"title": title}}}]},
+        ).execute()
+        new_props = resp["replies"][0]["addSheet"]["properties"]
+        self._by_title[new_props["title"]] = new_props
+        return new_props["sheetId"]
+
+    def invalidate(self):
+        """Drop cached metadata; the next lookup refetches it."""
+        self._by_title = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,40 @@
+import io
+
+import pandas as pd
+
+import csv_to_pointid_pdfs as pdfs
+
+
+def read(text):
+    return pd.read_csv(io.StringIO(text))
+
+
+def test_aggregate_records_keeps_int_columns_as_ints():
+    df = read("PointID,a,b\nNM-1,1,2\nNM-1,3,2\nNM-2,5,6\n")
+    assert pdfs.aggregate_records(df) == {
+        "NM-1": {"a": "1; 3", "b": "2"},
+        "NM-2": {"a": "5", "b": "6"},
+    }
+
+
+def test_aggregate_records_with_value_and_field_columns():
+    df = read("PointID,value,field\nNM-1,x,a\nNM-1,y,a\nNM-2,,\n")
+    assert pdfs.aggregate_records(df) == {
+        "NM-1": {"value": "x; y", "field": "a"},
+        "NM-2": {},
+    }
+
+
+def test_build_combined_pdf_renders_every_point(tmp_path):
+    items = [
+        (f"NM-{i}", {"Site": f"site {i}", "Depth": str(10 * i)}, [])
+        for i in range(1, 4)
+    ]
+    pdf_path = str(tmp_path / "pointids.pdf")
+    _, path, _, err = pdfs.build_combined_pdf(items, pdf_path)
+    assert err is None and path == pdf_path
+    data = (tmp_path / "pointids.pdf").read_bytes()
+    assert data.startswith(b"%PDF")
+    assert data.count(b"/Type /Page\n") == 3  # one page per point
+    for point_id, _, _ in items:
+        assert f"({point_id})".encode() in data  # outline entry
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Columnar (Arrow IPC stream) cache of tokenized transfer metrics files.
+
+The first time a metrics file is seen (by SHA-256 of its content) the
+tokenizer in transfer_metrics_io runs once and its events are written to
+  .transfer_metrics_cache/<sha256>_v<CACHE_FORMAT_VERSION>.arrow
+Later runs memory-map that file and replay the same events, skipping text
+parsing entirely.
+
+One record per tokenizer event. Columns:
+  event      : summary | header | row | end          (dictionary)
+  line_no    : line number for header/end events
+  PointID, Table, Field, Error (dictionary), complete
+  model, input_count, cleaned_count, transferred, issue_percentage
+             : summary values of the block the event belongs to (dictionary)
+
+pyarrow is optional: without it callers just parse the text.
+
+Usage (pre-build / inspect):
+  python transfer_metrics_cache.py METRICS.csv [...]
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+from transfer_metrics_io import (
+    REQUIRED_HEADERS,
+    SUMMARY_KEYS,
+    BlockEnd,
+    BlockSummary,
+    DetailHeader,
+    DetailRow,
+    iter_transfer_metric_events,
+)
+
+# ====== CONFIG ======
+CACHE_DIR = Path(".transfer_metrics_cache")
+# ====================
+
+CACHE_FORMAT_VERSION = 2
+BATCH_SIZE = 16_384  # events per record batch (the most ever held in Python lists)
+
+_EVENT_KIND = {BlockSummary: "summary", DetailHeader: "header", DetailRow: "row", BlockEnd: "end"}
+_DICT_COLS = ["event", "PointID", "Table", "Field", "Error"] + SUMMARY_KEYS
+_COLUMNS = ["event", "line_no"] + REQUIRED_HEADERS + ["complete"] + SUMMARY_KEYS
+
+
+def cache_available() -> bool:
+    return pa is not None
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of the file content (streamed in 1 MB blocks)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_path_for(path: Path, cache_dir: Path = CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"{file_digest(path)}_v{CACHE_FORMAT_VERSION}.arrow"
+
+
+def _schema() -> "pa.Schema":
+    dict_type = pa.dictionary(pa.int32(), pa.string())
+    types = {"line_no": pa.int32(), "complete": pa.bool_()}
+    return pa.schema([
+        (c, types.get(c, dict_type if c in _DICT_COLS else pa.string())) for c in _COLUMNS
+    ])
+
+
+def _event_batches(path: Path, schema: "pa.Schema") -> Iterator["pa.RecordBatch"]:
+    """
+    Tokenize the text file into record batches of BATCH_SIZE events (raises
+    ValueError like the tokenizer). Dictionary columns are encoded per batch.
+    """
+    cols: Dict[str, List] = {c: [] for c in _COLUMNS}
+    block = [""] * len(SUMMARY_KEYS)
+
+    def add(kind, line_no=None, pid="", table="", field="", error="", complete=False):
+        cols["event"].append(kind)
+        cols["line_no"].append(line_no)
+        cols["PointID"].append(pid)
+        cols["Table"].append(table)
+        cols["Field"].append(field)
+        cols["Error"].append(error)
+        cols["complete"].append(complete)
+        for k, v in zip(SUMMARY_KEYS, block):
+            cols[k].append(v)
+
+    def flush() -> "pa.RecordBatch":
+        arrays = []
+        for field in schema:
+            if pa.types.is_dictionary(field.type):
+                arr = pa.array(cols[field.name], type=pa.string()).dictionary_encode()
+            else:
+                arr = pa.array(cols[field.name], type=field.type)
+            arrays.append(arr)
+            cols[field.name].clear()
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    for ev in iter_transfer_metric_events(path):
+        t = type(ev)
+        if t is DetailRow:
+            add("row", None, *ev)
+        elif t is BlockSummary:
+            block = list(ev)
+            add("summary")
+        else:
+            add(_EVENT_KIND[t], ev.line_no)
+        if len(cols["event"]) >= BATCH_SIZE:
+            yield flush()
+    if cols["event"]:
+        yield flush()
+
+
+def build_cache(path: Path, cache_dir: Path = CACHE_DIR) -> Path:
+    """
+    Write the Arrow cache for path (if missing) and return its location.
+    Batches are written (Arrow IPC stream format, which allows a fresh
+    dictionary per batch) as they are tokenized, so memory stays bounded
+    by BATCH_SIZE events.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; the metrics cache is unavailable.")
+    target = cache_path_for(path, cache_dir)
+    if target.exists():
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # unique per builder: concurrent builds of the same file don't share a temp file
+    with tempfile.NamedTemporaryFile(dir=target.parent, prefix=target.name + ".",
+                                     suffix=".tmp", delete=False) as f:
+        tmp = f.name
+    try:
+        schema = _schema()
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_stream(sink, schema) as writer:
+                for batch in _event_batches(path, schema):
+                    writer.write_batch(batch)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return target
+
+
+def read_cached_table(path: Path, cache_dir: Path = CACHE_DIR) -> "pa.Table":
+    """Memory-mapped Arrow table for path (building the cache on first use)."""
+    target = build_cache(path, cache_dir)
+    source = pa.memory_map(str(target), "r")
+    return pa.ipc.open_stream(source).read_all()
+
+
+def _decode(arr) -> list:
+    """Arrow column -> Python list; dictionary columns are decoded via their indices (much faster)."""
+    if pa.types.is_dictionary(arr.type):
+        values = arr.dictionary.to_pylist()
+        return [values[i] for i in arr.indices.to_pylist()]
+    return arr.to_pylist()
+
+
+def iter_cached_events(path: Path, cache_dir: Path = CACHE_DIR) -> Iterator:
+    """
+    Same events as transfer_metrics_io.iter_transfer_metric_events, replayed
+    from the cache. Files the tokenizer rejects are streamed from text so the
+    caller still sees the events before the ValueError.
+    """
+    try:
+        table = read_cached_table(path, cache_dir)
+    except ValueError:
+        yield from iter_transfer_metric_events(path)
+        return
+
+    for batch in table.to_batches():
+        kinds = _decode(batch.column("event"))
+        pids, tables, fields, errors, complete, line_nos = (
+            _decode(batch.column(name))
+            for name in ("PointID", "Table", "Field", "Error", "complete", "line_no")
+        )
+        block_cols = None  # decoded lazily: only summary events need them
+        for i, kind in enumerate(kinds):
+            if kind == "row":
+                yield DetailRow(pids[i], tables[i], fields[i], errors[i], complete[i])
+            elif kind == "summary":
+                if block_cols is None:
+                    block_cols = [_decode(batch.column(k)) for k in SUMMARY_KEYS]
+                yield BlockSummary(*(col[i] for col in block_cols))
+            elif kind == "header":
+                yield DetailHeader(line_nos[i])
+            else:
+                yield BlockEnd(line_nos[i])
+
+
+def iter_cached_chunks(path: Path, cache_dir: Path = CACHE_DIR) -> Iterator[Dict[str, List[str]]]:
+    """Columnar PointID/Table/Field/Error batches of the data rows, straight from the cache."""
+    import pyarrow.compute as pc
+
+    table = read_cached_table(path, cache_dir)
+    for batch in table.to_batches():
+        rows = batch.filter(pc.equal(batch.column("event"), "row"))
+        if rows.num_rows:
+            yield {h: _decode(rows.column(h)) for h in REQUIRED_HEADERS}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python transfer_metrics_cache.py METRICS.csv [...]")
+        sys.exit(1)
+    if pa is None:
+        sys.exit("pyarrow is not installed.")
+    for arg in sys.argv[1:]:
+        path = Path(arg)
+        if not path.exists():
+            print(f"File not found: {path}")
+            continue
+        try:
+            target = build_cache(path)
+        except ValueError as e:
+            print(f"Skipped {path}: {e}")
+            continue
+        table = read_cached_table(path)
+        print(f"{path} -> {target} ({table.num_rows} events, {target.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Streaming reader for pipe-delimited transfer metrics files.
+
+File layout (one block per migrated model):
+   model|input_count|cleaned_count|transferred|issue_percentage   (first block only)
+   <values line>
+   PointID|Table|Field|Error
+   <data rows ...>
+   <blank line>
+   <values line>
+   PointID|Table|Field|Error
+   ...
+
+Older exports are just the PointID|Table|Field|Error header plus data rows;
+both layouts are handled.
+
+- iter_transfer_metric_events(path): single-pass tokenizer yielding typed
+  events (BlockSummary, DetailHeader, DetailRow, BlockEnd)
+- run_transfer_metrics_pass(path, sinks): one read of the file feeding any
+  number of sinks (wide layout, Issues counts, block summary, AMP rows)
+- iter_transfer_metric_records(path): yields (PointID, Table, Field, Error)
+  one line at a time; the file is never held in memory
+- iter_transfer_metric_chunks(path, chunk_size): same records as columnar
+  batches {"PointID": [...], "Table": [...], "Field": [...], "Error": [...]}
+- iter_detail_rows_with_offsets(path): data rows with their byte offset and
+  length in the file (for the PointID index)
+- Error keeps any extra pipes (each line is split with split('|', 3))
+- With USE_CACHE (and pyarrow installed) events are replayed from the Arrow
+  cache in transfer_metrics_cache.py instead of re-parsing the text
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+REQUIRED_HEADERS = ["PointID", "Table", "Field", "Error"]
+SUMMARY_KEYS = ["model", "input_count", "cleaned_count", "transferred", "issue_percentage"]
+DETAIL_HEADER_CANON = "pointid|table|field|error"
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Replay tokenized runs from the Arrow cache (transfer_metrics_cache.py) when
+# pyarrow is installed; otherwise every run parses the text.
+USE_CACHE = True
+
+_num_re = re.compile(r"-?\d+(\.\d+)?")
+
+
+def canon_line(line: str) -> str:
+    """Lowercase, strip each pipe-separated part and rejoin (for header checks)."""
+    return "|".join(p.strip().lower() for p in line.split("|"))
+
+
+def is_detail_header(line: str) -> bool:
+    return canon_line(line) == DETAIL_HEADER_CANON
+
+
+def is_summary_header(line: str) -> bool:
+    parts = [p.strip().lower() for p in line.split("|")]
+    return parts[:5] == SUMMARY_KEYS
+
+
+def looks_like_values_line(line: str) -> bool:
+    """Heuristic for a summary values line (model|int|int|int|pct)."""
+    parts = [p.strip() for p in line.split("|", 4)]
+    if len(parts) < 5:
+        return False
+    model, in_cnt, cl_cnt, trans, pct = parts[:5]
+    def is_num(x): return bool(_num_re.fullmatch(x or ""))
+    numeric_ok = is_num(in_cnt) and is_num(cl_cnt) and is_num(trans)
+    pct_ok = is_num(pct) or pct.endswith("%")
+    return numeric_ok and pct_ok
+
+
+def split_point_row(line: str) -> List[str]:
+    """Point row: PointID|Table|Field|Error(with extra pipes), padded to 4 parts."""
+    parts = [p.strip() for p in line.split("|", 3)]
+    if len(parts) < 4:
+        parts += [""] * (4 - len(parts))
+    return parts
+
+
+class BlockSummary(NamedTuple):
+    """model|input_count|cleaned_count|transferred|issue_percentage values line."""
+    model: str
+    input_count: str
+    cleaned_count: str
+    transferred: str
+    issue_percentage: str
+
+
+class DetailHeader(NamedTuple):
+    """A PointID|Table|Field|Error header line (1-based line number)."""
+    line_no: int
+
+
+class DetailRow(NamedTuple):
+    """A data row. complete is False when the line had fewer than 4 parts."""
+    point_id: str
+    table: str
+    field: str
+    error: str
+    complete: bool
+
+
+class BlockEnd(NamedTuple):
+    """A blank line (end of the current block's data rows)."""
+    line_no: int
+
+
+_SINK_METHODS = {
+    BlockSummary: "on_summary",
+    DetailHeader: "on_header",
+    DetailRow: "on_row",
+    BlockEnd: "on_block_end",
+}
+
+
+def _tokenize(lines: Iterable[Tuple[int, str]], path: Path) -> Iterator[Union[BlockSummary, DetailHeader, DetailRow, BlockEnd]]:
+    """Tokenizer state machine over (line_no, line) pairs; see iter_transfer_metric_events."""
+    in_detail = False
+    after_blank = True  # start of file behaves like the start of a block
+    saw_content = False
+    saw_header = False
+
+    for line_no, raw in lines:
+        line = raw.rstrip("\r\n")
+        if not line.strip():
+            if saw_content and not after_blank:
+                yield BlockEnd(line_no)
+            after_blank = True
+            continue
+        saw_content = True
+
+        if is_detail_header(line):
+            in_detail = True
+            saw_header = True
+            after_blank = False
+            yield DetailHeader(line_no)
+            continue
+
+        if is_summary_header(line):
+            in_detail = False
+            after_blank = True  # values line follows
+            continue
+
+        if after_blank:
+            after_blank = False
+            # a new block starts with a values line
+            if looks_like_values_line(line):
+                in_detail = False
+                yield BlockSummary(*[p.strip() for p in line.split("|", 4)])
+                continue
+
+        if not in_detail:
+            continue
+
+        pid, table, field, error = split_point_row(line)
+        yield DetailRow(pid, table, field, error, line.count("|") >= 3)
+
+    if saw_content and not saw_header:
+        raise ValueError(
+            f"No 'PointID|Table|Field|Error' header found in {path}."
+        )
+
+
+def iter_transfer_metric_events(path: Path) -> Iterator[Union[BlockSummary, DetailHeader, DetailRow, BlockEnd]]:
+    """
+    Tokenize the file in one pass, yielding typed events:
+      BlockSummary, DetailHeader, DetailRow, BlockEnd
+
+    The summary header line itself produces no event. Raises ValueError if the
+    file has content but no PointID|Table|Field|Error header.
+    """
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        yield from _tokenize(enumerate(f, start=1), path)
+
+
+def iter_detail_rows_with_offsets(path: Path) -> Iterator[Tuple[int, int, DetailRow]]:
+    """
+    (byte offset, byte length, DetailRow) for every data row, so the row can
+    be read back later with seek() + read(). Same tokenizer as above.
+    """
+    current = [0, 0]  # offset, length of the line the tokenizer last consumed
+
+    def lines():
+        offset = 0
+        with open(path, "rb") as f:
+            for line_no, raw in enumerate(f, start=1):
+                current[0], current[1] = offset, len(raw)
+                offset += len(raw)
+                text = raw.decode("utf-8", errors="replace")
+                if line_no == 1:
+                    text = text.lstrip("\ufeff")
+                yield line_no, text
+
+    # a DetailRow is yielded before the next line is read, so `current` is its line
+    for ev in _tokenize(lines(), path):
+        if type(ev) is DetailRow:
+            yield current[0], current[1], ev
+
+
+def iter_events(path: Path, use_cache: bool = USE_CACHE) -> Iterator[Union[BlockSummary, DetailHeader, DetailRow, BlockEnd]]:
+    """Events from the Arrow cache when enabled and available, else from the text."""
+    if use_cache:
+        import transfer_metrics_cache
+        if transfer_metrics_cache.cache_available():
+            return transfer_metrics_cache.iter_cached_events(path)
+    return iter_transfer_metric_events(path)
+
+
+def run_transfer_metrics_pass(path: Path, sinks: Iterable[object], use_cache: bool = USE_CACHE) -> None:
+    """
+    Read and tokenize the file once, feeding every event to every sink.
+
+    A sink is any object with some of these methods:
+      on_summary(BlockSummary), on_header(DetailHeader),
+      on_row(DetailRow), on_block_end(BlockEnd)
+    Missing methods are simply not called.
+    """
+    sinks = list(sinks)
+    dispatch = {}
+    for ev_type, meth in _SINK_METHODS.items():
+        dispatch[ev_type] = [
+            getattr(s, meth) for s in sinks if callable(getattr(s, meth, None))
+        ]
+    for ev in iter_events(path, use_cache):
+        for handler in dispatch[type(ev)]:
+            handler(ev)
+
+
+def iter_transfer_metric_records(path: Path, use_cache: bool = USE_CACHE) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Yield (PointID, Table, Field, Error) for every data row in the file.
+
+    Summary headers, summary values lines and repeated PointID|Table|Field|Error
+    headers are skipped. Raises ValueError if the file has content but no
+    PointID|Table|Field|Error header.
+    """
+    for ev in iter_events(path, use_cache):
+        if type(ev) is DetailRow:
+            yield ev[:4]
+
+
+def iter_transfer_metric_chunks(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE, use_cache: bool = USE_CACHE
+) -> Iterator[Dict[str, List[str]]]:
+    """
+    Yield columnar batches of at most chunk_size rows:
+      {"PointID": [...], "Table": [...], "Field": [...], "Error": [...]}
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+
+    if use_cache:
+        import transfer_metrics_cache
+        if transfer_metrics_cache.cache_available():
+            for cols in transfer_metrics_cache.iter_cached_chunks(path):
+                n = len(cols["PointID"])
+                for start in range(0, n, chunk_size):
+                    yield {h: v[start:start + chunk_size] for h, v in cols.items()}
+            return
+
+    cols: Dict[str, List[str]] = {h: [] for h in REQUIRED_HEADERS}
+    pids, tables, fields, errors = (cols[h] for h in REQUIRED_HEADERS)
+    n = 0
+    for pid, table, field, error in iter_transfer_metric_records(path, use_cache):
+        pids.append(pid)
+        tables.append(table)
+        fields.append(field)
+        errors.append(error)
+        n += 1
+        if n >= chunk_size:
+            yield cols
+            cols = {h: [] for h in REQUIRED_HEADERS}
+            pids, tables, fields, errors = (cols[h] for h in REQUIRED_HEADERS)
+            n = 0
+    if n:
+        yield cols
+
+
+def table_field_label(table: str, field: str) -> str:
+    """Table.Field, or just Table when Field is blank."""
+    return f"{table}.{field}" if field else table
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Full transfer metrics reporting run: read + tokenize the metrics file ONCE
+and feed every report from that single pass.
+
+Sinks registered on the pass:
+  - wide   : TableField_Issues wide layout   (transfermetrics.py)
+  - issues : FieldPairs_Checked 'Issues'     (transfermetrics_2.py)
+  - blocks : per-model block summary         (transfermetrics_3.py)
+  - amp    : AMP_review new rows             (transfer_to_amp_review.py)
+  - templates : per-template error counts    (error_templates.py)
+
+Each report is then written with its own script's Sheets config.
+
+Usage:
+  python transfer_metrics_report.py [METRICS.csv] [--only wide,issues,blocks,amp,templates]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from transfer_metrics_io import run_transfer_metrics_pass
+import transfermetrics
+import transfermetrics_2
+import transfermetrics_3
+import transfer_to_amp_review
+import error_templates
+
+# ====== CONFIG: EDIT THESE ======
+TRANSFER_METRICS_PATH = r"transfer_metrics_metrics_2025-11-26T02_00_31.csv"
+# ===============================
+
+REPORTS = ["wide", "issues", "blocks", "amp", "templates"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", nargs="?", default=TRANSFER_METRICS_PATH, help="Transfer metrics file")
+    ap.add_argument("--only", default=",".join(REPORTS), help=f"Comma-separated subset of: {','.join(REPORTS)}")
+    args = ap.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        sys.exit(f"File not found: {path}")
+
+    selected = [r.strip() for r in args.only.split(",") if r.strip()]
+    unknown = [r for r in selected if r not in REPORTS]
+    if unknown:
+        sys.exit(f"Unknown report(s): {unknown}. Choose from {REPORTS}.")
+
+    sinks = {}
+    if "wide" in selected:
+        sinks["wide"] = transfermetrics.WideLayoutSink()
+    if "issues" in selected:
+        sinks["issues"] = transfermetrics_2.IssueCountSink()
+    if "blocks" in selected:
+        sinks["blocks"] = transfermetrics_3.BlockSummarySink()
+    if "amp" in selected:
+        sinks["amp"] = transfer_to_amp_review.AmpRowSink()
+    if "templates" in selected and "amp" not in selected:
+        sinks["templates"] = error_templates.ErrorTemplateSink()
+
+    t0 = time.perf_counter()
+    before = transfer_to_amp_review.clean_error.cache_info()
+    try:
+        run_transfer_metrics_pass(path, sinks.values())
+    except ValueError as e:
+        sys.exit(str(e))
+    if "templates" in selected and "amp" in selected:
+        # cluster the AMP rows already built, instead of cleaning every error twice
+        sinks["templates"] = error_templates.ErrorTemplateSink()
+        for row in sinks["amp"].rows:
+            sinks["templates"].add(*row)
+    print(f"[info] Tokenized {path} once for {len(sinks)} report(s) in {time.perf_counter() - t0:.2f}s.")
+    if "amp" in sinks or "templates" in sinks:
+        print(f"[clean_error] {transfer_to_amp_review.clean_error_stats(before)}")
+
+    if "wide" in sinks:
+        transfermetrics.publish_wide_layout(
+            transfermetrics.build_wide_layout(sinks["wide"].to_frame())
+        )
+    if "issues" in sinks:
+        transfermetrics_2.publish_issue_counts(sinks["issues"].counts)
+    if "blocks" in sinks:
+        rows = sinks["blocks"].rows
+        print(f"[info] Parsed {len(rows)} summary block(s).")
+        service = transfermetrics_3.get_sheets_service(transfermetrics_3.SERVICE_ACCOUNT_FILE)
+        transfermetrics_3.write_block_summary(
+            service, transfermetrics_3.SPREADSHEET_ID, transfermetrics_3.SHEET_NAME, rows
+        )
+    if "amp" in sinks:
+        transfer_to_amp_review.publish_amp_rows(sinks["amp"].rows)
+    if "templates" in sinks:
+        error_templates.print_summary(sinks["templates"], 20)
+        error_templates.publish_templates(sinks["templates"].template_rows())
+
+
+if __name__ == "__main__":
+    main()
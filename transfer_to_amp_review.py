@@ -8,65 +8,146 @@ without overwriting existing content. Skips duplicates already present.
 - Parses transfer metrics blocks under "PointID|Table|Field|Error"
 - Extra error columns are appended to Error, then cleaned/normalized
 - Only writes to columns A..C using Sheets 'append' API
+- Rows already in the sheet are known from a local key index
+  (KEY_INDEX_PATH: hashes of the appended keys + the sheet height). Each run
+  only reads the sheet from the last indexed row down, to pick up rows
+  added by someone else; if that row no longer matches (rows deleted,
+  sorted, ...) the index is rebuilt from a full read of A:C.
+- New rows go out in chunks of at most APPEND_CHUNK_ROWS rows /
+  MAX_PAYLOAD_BYTES. The index is saved after the sync, when a chunk
+  fails and at the end; a re-run resumes with the rows that are still
+  missing (rows appended before an interrupted run are picked up by the
+  next run's read from the last indexed row down).
+
+Usage:
+  python transfer_to_amp_review.py [--rebuild-index]
 """
 
+import argparse
+import hashlib
+import json
+import os
+from functools import lru_cache
 from pathlib import Path
 import sys
 import re
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from sheets_batch import MAX_PAYLOAD_BYTES, _json_len, split_a1_start
+from transfer_metrics_io import run_transfer_metrics_pass, table_field_label
+
 # ======= CONFIG — EDIT THESE =======
 SERVICE_ACCOUNT_FILE = "transfermetrics_service_account.json"
 SPREADSHEET_ID = "1iQzeKqRWHIKbnNptH_wRQEpJ_pt1rI00ax9d5BhDAhU"
 SHEET_NAME = "AMP_review"
 TRANSFER_METRICS_PATH = r"transfer_metrics_metrics_2025-11-26T02_00_31.csv"
+KEY_INDEX_PATH = Path(".amp_review_index.json")
+APPEND_CHUNK_ROWS = 5000
 # ===================================
 
-HEADER_CANON = "pointid|table|field|error"
+HEADER = ["NMAquifer_Table.Field", "PointID", "Error"]
 
 def get_sheets_service(sa_path: str):
     scopes = ["https://www.googleapis.com/auth/spreadsheets"]
     creds = Credentials.from_service_account_file(sa_path, scopes=scopes)
     return build("sheets", "v4", credentials=creds)
 
-def canon(s: str) -> str:
-    return (s or "").strip().lower()
-
 # ---------- Error text normalization ----------
-_row_id_re = re.compile(r"\brow\.id\s*=\s*\d+,\s*", re.IGNORECASE)
-_sensor_type_re = re.compile(
-    r"key\s+error\s+adding\s+sensor_type\s*:\s*(?P<stype>[^,|]+?)\s*error\s*:\s*'?(?P=stype)'?",
-    re.IGNORECASE,
+_row_id_pat = r"\brow\.id\s*=\s*\d+,\s*"
+_sensor_type_pat = (
+    r"key\s+error\s+adding\s+sensor_type\s*:\s*(?P<stype>[^,|]+?)\s*error\s*:\s*'?(?P=stype)'?"
+)
+_org_missing_pat = (
+    r'key\s*\(organization\)\s*=\s*\((?P<org>[^)]+)\)\s*is\s*not\s*present\s*in\s*table\s*"?"?lexicon_term"?"?\.'
 )
-_org_missing_re = re.compile(
-    r'key\s*\(organization\)\s*=\s*\((?P<org>[^)]+)\)\s*is\s*not\s*present\s*in\s*table\s*"?"?lexicon_term"?"?\.',
+# All in-text rewrites as one alternation, applied in a single sub() pass
+_rewrite_re = re.compile(
+    f"(?P<row_id>{_row_id_pat})|(?P<sensor>{_sensor_type_pat})|(?P<org_missing>{_org_missing_pat})",
     re.IGNORECASE,
 )
 _value_error_prefix_re = re.compile(r"^\s*value\s*error\s*[,:\-]\s*", re.IGNORECASE)
+_spaces_re = re.compile(r"\s{2,}")
+_trailing_re = re.compile(r"[\s\|,]+$")
+# Every _rewrite_re match contains one of these; most messages contain none
+_rewrite_markers = ("row", "sensor_type", "organization")
+
+ERROR_CACHE_SIZE = 262_144  # distinct raw messages kept by clean_error's LRU
 
+def _rewrite(m: re.Match) -> str:
+    if m.group("row_id") is not None:
+        return ""
+    if m.group("sensor") is not None:
+        return f"Invalid sensor_type: {m.group('stype').strip()}"
+    return f"Invalid organization: {m.group('org').strip()}"
+
+@lru_cache(maxsize=ERROR_CACHE_SIZE)
 def clean_error(msg: str) -> str:
-    """Normalize error messages per requested rules."""
+    """
+    Normalize error messages per requested rules. Error texts repeat a lot,
+    so results are memoized per raw message (see clean_error_stats).
+    """
     if not msg:
         return msg
     out = msg
-    out = _row_id_re.sub("", out)
-    m = _sensor_type_re.search(out)
-    if m:
-        stype = m.group("stype").strip()
-        out = _sensor_type_re.sub(f"Invalid sensor_type: {stype}", out)
-    m = _org_missing_re.search(out)
-    if m:
-        org = m.group("org").strip()
-        out = _org_missing_re.sub(f"Invalid organization: {org}", out)
+    low = msg.lower()
+    if any(marker in low for marker in _rewrite_markers):
+        out = _rewrite_re.sub(_rewrite, out)
     out = _value_error_prefix_re.sub("", out)
     # remove straight & smart double quotes
     out = out.replace('"', '').replace('“', '').replace('”', '')
     # tidy whitespace / trailing punctuation
-    out = re.sub(r"\s{2,}", " ", out).strip()
-    out = re.sub(r"[\s\|,]+$", "", out)
+    out = _spaces_re.sub(" ", out).strip()
+    if out.endswith(("|", ",")):
+        out = _trailing_re.sub("", out)
     return out
 
+def clean_error_stats(since=None) -> str:
+    """
+    clean_error calls / hit rate. The LRU is process-wide, so pass the
+    clean_error.cache_info() taken before a run to report only that run.
+    """
+    info = clean_error.cache_info()
+    hits = info.hits - (since.hits if since else 0)
+    misses = info.misses - (since.misses if since else 0)
+    calls = hits + misses
+    rate = hits / calls if calls else 0.0
+    return f"{calls} error(s), {misses} normalized, cache hit rate {rate:.1%}"
+
+class AmpRowSink:
+    """
+    Sink for run_transfer_metrics_pass: [NMAquifer_Table.Field, PointID, Error]
+    rows from each header-delimited block (a blank line ends the block).
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._active = False
+
+    def on_header(self, ev):
+        self._active = True
+
+    def on_block_end(self, ev):
+        self._active = False
+
+    def amp_row(self, ev):
+        """[NMAquifer_Table.Field, PointID, Error] for a detail row, None outside a block."""
+        if not self._active or not ev.complete:
+            return None
+        # extra error columns: strip each, rejoin with " | "
+        parts = [p.strip() for p in ev.error.split("|")]
+        error = parts[0]
+        extra = " | ".join(parts[1:]).strip() if len(parts) > 1 else ""
+        combined_error = error if not extra else f"{error} | {extra}"
+        combined_error = clean_error(combined_error)
+        nm_tf = table_field_label(ev.table, ev.field)
+        return [nm_tf, ev.point_id, combined_error]
+
+    def on_row(self, ev):
+        row = self.amp_row(ev)
+        if row is not None:
+            self.rows.append(row)
+
 def parse_amp_rows(path: Path):
     """
     Return list of rows: [NMAquifer_Table.Field, PointID, Error]
@@ -74,37 +155,14 @@ def parse_amp_rows(path: Path):
     """
     if not path.exists():
         sys.exit(f"File not found: {path}")
-    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
-        lines = [ln.rstrip("\n") for ln in f]
-
-    rows_out = []
-    n, i = len(lines), 0
-    while i < n:
-        line = lines[i].strip()
-        if line and canon(line) == HEADER_CANON:
-            i += 1
-            while i < n:
-                raw = lines[i]
-                s = raw.strip()
-                if not s:
-                    break
-                if canon(s) == HEADER_CANON:
-                    break
-                parts = [p.strip() for p in raw.split("|")]
-                if len(parts) >= 4:
-                    point_id = parts[0]
-                    table    = parts[1]
-                    field    = parts[2]
-                    error    = parts[3]
-                    extra    = " | ".join(parts[4:]).strip() if len(parts) > 4 else ""
-                    combined_error = error if not extra else f"{error} | {extra}"
-                    combined_error = clean_error(combined_error)
-                    nm_tf = f"{table}.{field}" if field else table
-                    rows_out.append([nm_tf, point_id, combined_error])
-                i += 1
-            continue
-        i += 1
-    return rows_out
+    sink = AmpRowSink()
+    before = clean_error.cache_info()
+    try:
+        run_transfer_metrics_pass(path, [sink])
+    except ValueError:
+        pass  # no header-delimited blocks → no rows
+    print(f"[clean_error] {clean_error_stats(before)}")
+    return sink.rows
 
 def ensure_tab(service, spreadsheet_id: str, tab_name: str):
     meta = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
@@ -114,70 +172,202 @@ def ensure_tab(service, spreadsheet_id: str, tab_name: str):
             body={"requests": [{"addSheet": {"properties": {"title": tab_name}}}]},
         ).execute()
 
-def load_existing_set(service, spreadsheet_id: str, tab_name: str):
-    """Load existing A:C rows into a set of tuples for duplicate detection."""
+def row_key(row: list) -> tuple:
+    """(Table.Field, PointID, Error) of a sheet/new row, stripped."""
+    return tuple((row[i].strip() if len(row) > i else "") for i in range(3))
+
+def key_hash(key: tuple) -> str:
+    return hashlib.blake2b("\x1f".join(key).encode("utf-8"), digest_size=8).hexdigest()
+
+def is_header(row: list) -> bool:
+    return [v.lower() for v in row_key(row)] == [h.lower() for h in HEADER]
+
+def read_rows(service, spreadsheet_id: str, tab_name: str, start_row: int = 1, end_row: int = None) -> list:
+    """A:C values from start_row down to end_row (default: the last non-empty row)."""
     resp = service.spreadsheets().values().get(
         spreadsheetId=spreadsheet_id,
-        range=f"'{tab_name}'!A1:C"
+        range=f"'{tab_name}'!A{start_row}:C{end_row or ''}"
     ).execute()
-    values = resp.get("values", [])
-    if not values:
-        return set(), 0
-    # skip header if present
-    start = 1 if values and [v.strip().lower() for v in values[0]] == \
-        ["nmaquifer_table.field", "pointid", "error"] else 0
-    existing = set()
-    for row in values[start:]:
-        a = row[0].strip() if len(row) > 0 else ""
-        b = row[1].strip() if len(row) > 1 else ""
-        c = row[2].strip() if len(row) > 2 else ""
-        if a or b or c:
-            existing.add((a, b, c))
-    return existing, len(values)
+    return resp.get("values", [])
 
-def main():
+class AmpKeyIndex:
+    """
+    Hashes of the (Table.Field, PointID, Error) keys already in the sheet, plus
+    the sheet height they cover and the hash of the last covered row (used to
+    check the sheet still lines up with the index).
+    """
+
+    def __init__(self, spreadsheet_id: str, tab_name: str):
+        self.spreadsheet_id = spreadsheet_id
+        self.tab_name = tab_name
+        self.keys = set()
+        self.rows = 0           # sheet rows covered (header included)
+        self.last_row = None    # key hash of row `rows`
+
+    @classmethod
+    def load(cls, spreadsheet_id: str, tab_name: str, path: Path = None) -> "AmpKeyIndex":
+        index = cls(spreadsheet_id, tab_name)
+        try:
+            with open(path or KEY_INDEX_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("spreadsheet_id") == spreadsheet_id and data.get("sheet") == tab_name:
+                index.keys = set(data["keys"])
+                index.rows = data["rows"]
+                index.last_row = data["last_row"]
+        except (OSError, ValueError, KeyError):
+            pass  # no/unreadable index: start empty, sync() reads the whole sheet
+        return index
+
+    def save(self, path: Path = None):
+        path = Path(path or KEY_INDEX_PATH)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "spreadsheet_id": self.spreadsheet_id,
+                "sheet": self.tab_name,
+                "rows": self.rows,
+                "last_row": self.last_row,
+                "keys": list(self.keys),
+            }, f)
+        os.replace(tmp, path)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key_hash(key) in self.keys
+
+    def add_rows(self, values: list):
+        """Account for values appearing right below the covered rows."""
+        for row in values:
+            key = row_key(row)
+            if any(key) and not is_header(row):
+                self.keys.add(key_hash(key))
+        if values:
+            self.rows += len(values)
+            self.last_row = key_hash(row_key(values[-1]))
+
+    def sync_gap(self, service, first_new_row: int) -> int:
+        """
+        Index rows that appeared between the covered rows and first_new_row
+        (appended by someone else since the sync). Returns how many.
+        """
+        if first_new_row <= self.rows + 1:
+            return 0
+        gap = read_rows(service, self.spreadsheet_id, self.tab_name, self.rows + 1, first_new_row - 1)
+        gap += [[]] * (first_new_row - 1 - self.rows - len(gap))  # trailing blank rows
+        self.add_rows(gap)
+        return len(gap)
+
+    def rebuild(self, service):
+        self.keys, self.rows, self.last_row = set(), 0, None
+        self.add_rows(read_rows(service, self.spreadsheet_id, self.tab_name))
+
+    def sync(self, service) -> str:
+        """
+        Bring the index up to date with the sheet. Reads only from the last
+        covered row down; falls back to a full read if that row changed.
+        Returns what was done (for the log).
+        """
+        if not self.rows:
+            self.rebuild(service)
+            return f"read {self.rows} row(s)"
+        tail = read_rows(service, self.spreadsheet_id, self.tab_name, self.rows)
+        if not tail or key_hash(row_key(tail[0])) != self.last_row:
+            self.rebuild(service)
+            return f"sheet no longer matches the index; re-read {self.rows} row(s)"
+        self.rows -= 1  # tail[0] is the last covered row
+        self.add_rows(tail)
+        return f"{len(tail) - 1} row(s) added outside this script"
+
+def append_chunks(rows: list) -> list:
+    """Split rows into chunks of at most APPEND_CHUNK_ROWS rows / MAX_PAYLOAD_BYTES."""
+    chunks, cur, size = [], [], 0
+    for row in rows:
+        n = _json_len(row) + 1
+        if cur and (len(cur) >= APPEND_CHUNK_ROWS or size + n > MAX_PAYLOAD_BYTES):
+            chunks.append(cur)
+            cur, size = [], 0
+        cur.append(row)
+        size += n
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+def publish_amp_rows(new_rows: list, rebuild_index: bool = False):
     service = get_sheets_service(SERVICE_ACCOUNT_FILE)
     ensure_tab(service, SPREADSHEET_ID, SHEET_NAME)
 
-    # 1) Parse new rows from transfer metrics
-    new_rows = parse_amp_rows(Path(TRANSFER_METRICS_PATH))
     # Deduplicate within incoming batch
     seen_batch = set()
     unique_new = []
     for r in new_rows:
-        key = (r[0].strip(), r[1].strip(), r[2].strip())
+        key = row_key(r)
         if key not in seen_batch:
             seen_batch.add(key)
             unique_new.append(r)
 
-    # 2) Load existing rows from A:C to avoid duplicates
-    existing_set, current_height = load_existing_set(service, SPREADSHEET_ID, SHEET_NAME)
+    # 2) Bring the local key index up to date with the sheet
+    index = AmpKeyIndex.load(SPREADSHEET_ID, SHEET_NAME)
+    if rebuild_index:
+        index.rebuild(service)
+        print(f"[index] Rebuilt from {index.rows} sheet row(s).")
+    else:
+        print(f"[index] {index.sync(service)}; {len(index.keys)} key(s) known.")
+    index.save()
 
     # 3) Filter to only truly new rows
-    to_append = [r for r in unique_new if (r[0].strip(), r[1].strip(), r[2].strip()) not in existing_set]
+    to_append = [r for r in unique_new if row_key(r) not in index]
 
     if not to_append:
         print("[info] No new rows to append. Nothing changed.")
         return
 
     # 4) If sheet is empty, include header first; otherwise just append rows
-    # Check if there's any data at all (height == 0 or 1 with no header)
-    need_header = (current_height == 0) or (current_height == 1 and len(existing_set) == 0)
-    values = []
-    if need_header:
-        values.append(["NMAquifer_Table.Field", "PointID", "Error"])
+    need_header = index.rows == 0
+    values = [HEADER] if need_header else []
     values.extend(to_append)
 
-    # 5) Append to A:C only (no overwrite of other columns)
-    service.spreadsheets().values().append(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{SHEET_NAME}'!A:C",
-        valueInputOption="RAW",
-        insertDataOption="INSERT_ROWS",
-        body={"values": values}
-    ).execute()
+    # 5) Append to A:C only (no overwrite of other columns), chunk by chunk
+    chunks = append_chunks(values)
+    appended = 0
+    i = 0
+    while i < len(chunks):
+        chunk = chunks[i]
+        try:
+            resp = service.spreadsheets().values().append(
+                spreadsheetId=SPREADSHEET_ID,
+                range=f"'{SHEET_NAME}'!A:C",
+                valueInputOption="RAW",
+                insertDataOption="INSERT_ROWS",
+                body={"values": chunk}
+            ).execute()
+        except Exception as e:
+            index.save()
+            sys.exit(
+                f"[error] Chunk {i + 1}/{len(chunks)} failed after {appended} new row(s) were appended: {e}\n"
+                f"        Progress is saved in {KEY_INDEX_PATH}; re-run to append the rest."
+            )
+        header_rows = 1 if i == 0 and need_header else 0
+        i += 1
+        updated = resp.get("updates", {}).get("updatedRange")
+        if updated and index.sync_gap(service, split_a1_start(updated)[2]):
+            # rows added by someone else since the sync: don't append their keys again
+            rest = [r for c in chunks[i:] for r in c if row_key(r) not in index]
+            chunks[i:] = append_chunks(rest)
+        index.add_rows(chunk)
+        appended += len(chunk) - header_rows
+        print(f"[append] chunk {i}/{len(chunks)}: {len(chunk)} row(s)")
 
-    print(f"[done] Appended {len(to_append)} new row(s) to {SHEET_NAME}!A:C (kept existing content).")
+    index.save()
+    print(f"[done] Appended {appended} new row(s) to {SHEET_NAME}!A:C (kept existing content).")
+
+def main():
+    ap = argparse.ArgumentParser(description="Append new transfer metrics errors to AMP_review.")
+    ap.add_argument("--rebuild-index", action="store_true",
+                    help=f"Re-read the whole sheet into {KEY_INDEX_PATH} before appending")
+    args = ap.parse_args()
+
+    # 1) Parse new rows from transfer metrics
+    new_rows = parse_amp_rows(Path(TRANSFER_METRICS_PATH))
+    publish_amp_rows(new_rows, args.rebuild_index)
 
 if __name__ == "__main__":
     main()
@@ -4,7 +4,7 @@
 """
 Parse a pipe-delimited transfer metrics file with possible extra pipes in the Error field.
 Columns: PointID|Table|Field|Error
-- Robustly split each line with split('|', 3)
+- Stream lines via transfer_metrics_io (split('|', 3), block-aware)
 - Group by Table+Field
 - Wide layout: each column = Table.Field; row2 = count; rows3+ = PointIDs
 - Write to existing Google Sheet / tab
@@ -12,10 +12,14 @@ Columns: PointID|Table|Field|Error
 
 from pathlib import Path
 import sys
+import numpy as np
 import pandas as pd
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from sheets_batch import SheetsBatchWriter
+from transfer_metrics_io import REQUIRED_HEADERS, iter_transfer_metric_chunks
+
 # ================== CONFIG — EDIT THESE ==================
 SERVICE_ACCOUNT_FILE = "service_account.json"
 SPREADSHEET_ID = "1NtkaSWh8COQpMXd9AZ-fXMsRok9l-wwC1sz0lgVCTeo"  # your sheet
@@ -23,8 +27,6 @@ TAB_NAME = "TableField_Issues"                                  # target tab
 CSV_PATH = r"transfer_metrics_metrics_2025-11-13T13_07_31.csv"                   # your file
 # =========================================================
 
-REQUIRED_HEADERS = ["PointID", "Table", "Field", "Error"]
-
 def get_sheets_service(sa_path: str):
     scopes = ["https://www.googleapis.com/auth/spreadsheets"]
     creds = Credentials.from_service_account_file(sa_path, scopes=scopes)
@@ -39,110 +41,111 @@ def ensure_tab(service, spreadsheet_id: str, tab_name: str) -> int:
     resp = service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body=req).execute()
     return resp["replies"][0]["addSheet"]["properties"]["sheetId"]
 
-def clear_range(service, spreadsheet_id: str, tab_name: str, a1_range: str = "A:ZZ"):
-    service.spreadsheets().values().clear(
-        spreadsheetId=spreadsheet_id,
-        range=f"'{tab_name}'!{a1_range}"
-    ).execute()
-
-def write_values(service, spreadsheet_id: str, tab_name: str, start_cell: str, values):
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=f"'{tab_name}'!{start_cell}",
-        valueInputOption="RAW",
-        body={"values": values}
-    ).execute()
-
 def robust_read_transfer_metrics(path: Path) -> pd.DataFrame:
-    """Read the file line-by-line and split each line into exactly 4 fields:
+    """Stream the file through transfer_metrics_io in columnar chunks and
+       build the DataFrame from those batches (no per-row dicts):
        PointID | Table | Field | Error(with possible extra pipes)
     """
-    rows = []
-    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
-        lines = f.read().splitlines()
-
-    if not lines:
+    try:
+        frames = [
+            pd.DataFrame(chunk, columns=REQUIRED_HEADERS)
+            for chunk in iter_transfer_metric_chunks(path)
+        ]
+    except ValueError as e:
+        sys.exit(str(e))
+
+    if not frames:
         sys.exit("CSV appears empty.")
 
-    # Detect header (first non-empty line)
-    header = None
-    start_idx = 0
-    for i, ln in enumerate(lines):
-        if ln.strip():
-            header = [h.strip() for h in ln.split("|", 3)]
-            start_idx = i + 1
-            break
-    if header is None:
-        sys.exit("No header found.")
-
-    # Validate headers (allow minor case differences)
-    header_map = {h.lower(): h for h in header}
-    for need in REQUIRED_HEADERS:
-        if need.lower() not in header_map:
-            sys.exit(f"Missing required header '{need}'. Found headers: {header}")
-
-    # Parse rows
-    for ln in lines[start_idx:]:
-        if not ln.strip():
-            continue
-        parts = ln.split("|", 3)
-        # pad to 4 parts if short
-        if len(parts) < 4:
-            parts = parts + [""] * (4 - len(parts))
-        # trim
-        parts = [p.strip() for p in parts]
-        row = dict(zip(header, parts))
-        rows.append(row)
-
-    df = pd.DataFrame(rows)
-    # Normalize column names exactly to REQUIRED_HEADERS
-    rename_map = {}
-    lower_to_std = {h.lower(): h for h in REQUIRED_HEADERS}
-    for col in df.columns:
-        lc = col.lower()
-        if lc in lower_to_std:
-            rename_map[col] = lower_to_std[lc]
-    df = df.rename(columns=rename_map)
-
-    # Keep only expected columns
-    df = df[REQUIRED_HEADERS]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return normalize_metrics_frame(df)
 
+def normalize_metrics_frame(df: pd.DataFrame) -> pd.DataFrame:
     # Normalize strings
     for c in REQUIRED_HEADERS:
         df[c] = df[c].astype(str).fillna("").str.strip()
-
     return df
 
-def build_wide_layout(df: pd.DataFrame) -> pd.DataFrame:
-    # Label = Table.Field (or just Table if Field blank)
-    labels = df.apply(lambda r: f"{r['Table']}.{r['Field']}" if r["Field"] else r["Table"], axis=1)
+class WideLayoutSink:
+    """Sink for run_transfer_metrics_pass: collects the detail rows column-wise."""
+
+    def __init__(self):
+        self.cols = {h: [] for h in REQUIRED_HEADERS}
+
+    def on_row(self, ev):
+        self.cols["PointID"].append(ev.point_id)
+        self.cols["Table"].append(ev.table)
+        self.cols["Field"].append(ev.field)
+        self.cols["Error"].append(ev.error)
+
+    def to_frame(self) -> pd.DataFrame:
+        return normalize_metrics_frame(pd.DataFrame(self.cols, columns=REQUIRED_HEADERS))
+
+def table_field_labels(df: pd.DataFrame) -> pd.Series:
+    """Table.Field per row (or just Table if Field blank), built once per distinct pair."""
+    pairs = df[["Table", "Field"]].astype("category")
+    t_cat, f_cat = pairs["Table"].cat, pairs["Field"].cat
+    pair_codes, uniq = pd.factorize(
+        pd.MultiIndex.from_arrays([t_cat.codes, f_cat.codes])
+    )
+    t_vals = t_cat.categories.to_numpy(dtype=object)
+    f_vals = f_cat.categories.to_numpy(dtype=object)
+    uniq_labels = np.array(
+        [f"{t_vals[t]}.{f_vals[f]}" if f_vals[f] else t_vals[t] for t, f in uniq],
+        dtype=object,
+    )
+    return pd.Series(uniq_labels[pair_codes], index=df.index, dtype=object)
 
-    # Group PointIDs by label
-    grouped = {}
-    for label, pid in zip(labels, df["PointID"]):
-        grouped.setdefault(label, []).append(pid)
+def build_wide_layout(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Wide layout, one column per Table.Field (sorted):
+      row 1 = label, row 2 = count of non-empty PointIDs, rows 3+ = PointIDs
+    Columns are padded with "" to the longest one.
+    """
+    if df.empty:
+        return pd.DataFrame({})
 
-    # Sort labels
-    items = sorted(grouped.items(), key=lambda kv: (kv[0] or ""))
+    # Label = Table.Field (or just Table if Field blank)
+    codes, uniques = pd.factorize(table_field_labels(df), sort=False)
+    uniques = list(uniques)
+
+    # Sort labels; column position per label code
+    order = sorted(range(len(uniques)), key=lambda c: uniques[c] or "")
+    col_of = np.empty(len(uniques), dtype=np.intp)
+    col_of[order] = np.arange(len(order))
+    headers = [uniques[c] or "(unknown)" for c in order]
+
+    # Non-empty PointIDs, numbered within their label (groupby + cumcount)
+    pids = df["PointID"].to_numpy(dtype=object)
+    keep = pids != ""
+    kept_codes = codes[keep]
+    pos = pd.Series(kept_codes).groupby(kept_codes, sort=False).cumcount().to_numpy()
+    counts = np.bincount(kept_codes, minlength=len(uniques))[order]
+
+    max_len = 2 + (int(counts.max()) if len(counts) else 0)
+    grid = np.full((max_len, len(headers)), "", dtype=object)
+    grid[0, :] = headers
+    grid[1, :] = [str(c) for c in counts]
+    grid[pos + 2, col_of[kept_codes]] = pids[keep]
+
+    return pd.DataFrame(grid, columns=headers, dtype=object)
 
-    # Build columns: header (label), count, then PointIDs
-    columns = {}
-    max_len = 0
-    for label, ids in items:
-        ids_clean = [x for x in ids if x]
-        col_vals = [label or "(unknown)", str(len(ids_clean))] + ids_clean
-        columns[label or "(unknown)"] = col_vals
-        max_len = max(max_len, len(col_vals))
+def dataframe_to_2d_list(df: pd.DataFrame):
+    return [df.columns.tolist()] + df.to_numpy(dtype=object).tolist()
 
-    # Pad to equal lengths
-    for k, v in columns.items():
-        if len(v) < max_len:
-            columns[k] = v + [""] * (max_len - len(v))
+def publish_wide_layout(wide: pd.DataFrame):
+    service = get_sheets_service(SERVICE_ACCOUNT_FILE)
+    ensure_tab(service, SPREADSHEET_ID, TAB_NAME)
 
-    return pd.DataFrame(columns)
+    # clear + write go out as batchClear/batchUpdate; large layouts are split by rows
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+    writer.clear(f"'{TAB_NAME}'!A:ZZ")
+    values = dataframe_to_2d_list(wide)
+    writer.write(f"'{TAB_NAME}'!A1", values)
+    calls = writer.flush()
 
-def dataframe_to_2d_list(df: pd.DataFrame):
-    return [df.columns.tolist()] + df.values.tolist()
+    print(f"Done. Wrote {wide.shape[1]} columns × {wide.shape[0]+1} rows to sheet {SPREADSHEET_ID}, tab '{TAB_NAME}' "
+          f"in {sum(calls.values())} call(s).")
 
 def main():
     csv_path = Path(CSV_PATH)
@@ -150,16 +153,7 @@ def main():
         sys.exit(f"File not found: {csv_path}")
 
     df = robust_read_transfer_metrics(csv_path)
-    wide = build_wide_layout(df)
-
-    service = get_sheets_service(SERVICE_ACCOUNT_FILE)
-    ensure_tab(service, SPREADSHEET_ID, TAB_NAME)
-    clear_range(service, SPREADSHEET_ID, TAB_NAME, "A:ZZ")
-
-    values = dataframe_to_2d_list(wide)
-    write_values(service, SPREADSHEET_ID, TAB_NAME, "A1", values)
-
-    print(f"Done. Wrote {wide.shape[1]} columns × {wide.shape[0]+1} rows to sheet {SPREADSHEET_ID}, tab '{TAB_NAME}'.")
+    publish_wide_layout(build_wide_layout(df))
 
 if __name__ == "__main__":
     main()
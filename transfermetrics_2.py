@@ -17,6 +17,9 @@ import sys
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from sheets_batch import SheetsBatchWriter
+from transfer_metrics_io import run_transfer_metrics_pass, table_field_label
+
 # ================== CONFIG — EDIT THESE ==================
 SERVICE_ACCOUNT_FILE = "service_account.json"
 SPREADSHEET_ID = "1NtkaSWh8COQpMXd9AZ-fXMsRok9l-wwC1sz0lgVCTeo"
@@ -31,58 +34,33 @@ def get_sheets_service(sa_path: str):
     return build("sheets", "v4", credentials=creds)
 
 
+class IssueCountSink:
+    """Sink for run_transfer_metrics_pass: counts rows per normalized Table.Field."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def on_row(self, ev):
+        key = table_field_label(ev.table, ev.field).strip().lower()
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+
 def robust_read_counts(csv_path: Path) -> dict:
     """
-    Read the file line-by-line and split each line into exactly 4 parts:
+    Stream the file once (transfer_metrics_io) as
     PointID | Table | Field | Error(with possible extra pipes)
     Return dict: normalized_label -> count
     """
     if not csv_path.exists():
         sys.exit(f"File not found: {csv_path}")
 
-    with open(csv_path, "r", encoding="utf-8-sig", errors="replace") as f:
-        lines = [ln.rstrip("\n") for ln in f.readlines()]
-
-    if not lines:
-        return {}
-
-    # Header = first non-empty line
-    header = None
-    start_idx = 0
-    for i, ln in enumerate(lines):
-        if ln.strip():
-            header = [h.strip() for h in ln.split("|", 3)]
-            start_idx = i + 1
-            break
-    if header is None:
-        return {}
-
-    # Indices for columns (case-insensitive)
-    hmap = {h.lower(): idx for idx, h in enumerate(header)}
-    for need in ("pointid", "table", "field", "error"):
-        if need not in hmap:
-            sys.exit(f"Transfer metrics missing required header '{need}'. Found: {header}")
-
-    ti, fi = hmap["table"], hmap["field"]
-
-    def norm(s: str) -> str:
-        return (s or "").strip().lower()
-
-    counts = {}
-    for ln in lines[start_idx:]:
-        if not ln.strip():
-            continue
-        parts = ln.split("|", 3)
-        if len(parts) < 4:
-            parts += [""] * (4 - len(parts))
-        parts = [p.strip() for p in parts]
-        table = parts[ti]
-        field = parts[fi]
-        label = f"{table}.{field}" if field else table
-        key = norm(label)
-        counts[key] = counts.get(key, 0) + 1
+    sink = IssueCountSink()
+    try:
+        run_transfer_metrics_pass(csv_path, [sink])
+    except ValueError as e:
+        sys.exit(f"Transfer metrics: {e}")
 
-    return counts
+    return sink.counts
 
 
 def col_index_to_letter(idx: int) -> str:
@@ -95,10 +73,7 @@ def col_index_to_letter(idx: int) -> str:
     return letters
 
 
-def main():
-    # 1) Build counts from CSV
-    counts = robust_read_counts(Path(CSV_PATH))
-
+def publish_issue_counts(counts: dict):
     # 2) Connect to Sheets and read the target sheet
     service = get_sheets_service(SERVICE_ACCOUNT_FILE)
 
@@ -144,15 +119,18 @@ def main():
     total_rows = len(values)  # includes header
     col_payload = [["Issues"]] + issues_vals  # header + N rows
 
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{SHEET_NAME}'!{col_letter}1:{col_letter}{total_rows}",
-        valueInputOption="RAW",
-        body={"values": col_payload}
-    ).execute()
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID)
+    writer.write(f"'{SHEET_NAME}'!{col_letter}1:{col_letter}{total_rows}", col_payload)
+    writer.flush()
 
     print(f"✓ Wrote Issues for {len(issues_vals)} rows to '{SHEET_NAME}' ({col_letter} column).")
 
 
+def main():
+    # 1) Build counts from CSV
+    counts = robust_read_counts(Path(CSV_PATH))
+    publish_issue_counts(counts)
+
+
 if __name__ == "__main__":
     main()
@@ -23,11 +23,13 @@ Writes rows to FieldPairs_Checked!G1 with headers:
 
 from pathlib import Path
 import sys
-import re
 
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+from sheets_batch import SheetsBatchWriter
+from transfer_metrics_io import run_transfer_metrics_pass
+
 # ====== CONFIG: EDIT THESE ======
 SERVICE_ACCOUNT_FILE = "service_account.json"
 SHEET_NAME = "transfer_metrics"
@@ -35,140 +37,47 @@ SPREADSHEET_ID = "1NtkaSWh8COQpMXd9AZ-fXMsRok9l-wwC1sz0lgVCTeo"
 TRANSFER_METRICS_PATH = r"transfer_metrics_metrics_2025-11-26T02_00_31.csv"
 # ===============================
 
-SUMMARY_KEYS = ["model", "input_count", "cleaned_count", "transferred", "issue_percentage"]
-
 def get_sheets_service(sa_path: str):
     scopes = ["https://www.googleapis.com/auth/spreadsheets"]
     creds = Credentials.from_service_account_file(sa_path, scopes=scopes)
     return build("sheets", "v4", credentials=creds)
 
-def is_summary_header(line: str) -> bool:
-    parts = [p.strip().lower() for p in line.split("|")]
-    return parts[:5] == SUMMARY_KEYS
-
-def looks_like_values_line(line: str) -> bool:
-    """Heuristic for a summary values line (no header)."""
-    parts = [p.strip() for p in line.split("|", 4)]
-    if len(parts) < 5:
-        return False
-    model, in_cnt, cl_cnt, trans, pct = parts[:5]
-    def is_num(x): return bool(re.fullmatch(r"-?\d+(\.\d+)?", x or ""))
-    numeric_ok = is_num(in_cnt) and is_num(cl_cnt) and is_num(trans)
-    pct_ok = is_num(pct) or pct.endswith("%")
-    return numeric_ok and pct_ok
-
-def split5(line: str):
-    parts = [p.strip() for p in line.split("|", 4)]
-    if len(parts) < 5:
-        parts += [""] * (5 - len(parts))
-    return parts[:5]
-
-def split_point_row(line: str):
-    """Point row: PointID|Table|Field|Error(with extra pipes)."""
-    parts = [p.strip() for p in line.split("|", 3)]
-    if len(parts) < 4:
-        parts += [""] * (4 - len(parts))
-    return parts  # [PointID, Table, Field, Error...]
+class BlockSummarySink:
+    """
+    Sink for run_transfer_metrics_pass: one row per summary values line.
+    Table is taken from the first data row of that block ("" if it has none).
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._pending = None  # summary row still waiting for its Table
+
+    def on_summary(self, ev):
+        self._pending = {
+            "model": ev.model,
+            "Table": "",
+            "input_count": ev.input_count,
+            "cleaned_count": ev.cleaned_count,
+            "transferred": ev.transferred,
+            "issue_percentage": ev.issue_percentage,
+        }
+        self.rows.append(self._pending)
+
+    def on_row(self, ev):
+        if self._pending is not None and ev.point_id.lower() != "pointid":
+            self._pending["Table"] = ev.table
+            self._pending = None
 
 def parse_transfer_metrics_blocks(path: Path):
     if not path.exists():
         sys.exit(f"File not found: {path}")
 
-    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
-        lines = [ln.rstrip("\n") for ln in f]
-
-    out_rows = []
-    n = len(lines)
-    i = 0
-
-    # --- FIRST BLOCK: allow explicit header ---
-    while i < n and not lines[i].strip():
-        i += 1
-
-    if i < n and is_summary_header(lines[i]):
-        # next non-empty line is the values line
-        j = i + 1
-        while j < n and not lines[j].strip():
-            j += 1
-        if j < n and looks_like_values_line(lines[j]):
-            model, input_count, cleaned_count, transferred, issue_percentage = split5(lines[j])
-
-            # infer Table from first data row after this values line
-            table_val = ""
-            k = j + 1
-            while k < n:
-                s = lines[k].strip()
-                k += 1
-                if not s:
-                    continue
-                if s.lower().startswith("pointid|table|field|error"):
-                    continue
-                pid, tbl, fld, _ = split_point_row(s)
-                # works even if Field is blank; we only need Table (tbl)
-                if pid.lower() == "pointid":
-                    continue
-                table_val = tbl
-                break
-
-            out_rows.append({
-                "model": model,
-                "Table": table_val,
-                "input_count": input_count,
-                "cleaned_count": cleaned_count,
-                "transferred": transferred,
-                "issue_percentage": issue_percentage,
-            })
-            i = j + 1
-        else:
-            i += 1  # header but missing values; move on
-
-    # --- SUBSEQUENT BLOCKS: blank line then values line (no header) ---
-    while i < n:
-        # seek blank(s)
-        while i < n and lines[i].strip():
-            i += 1
-        while i < n and not lines[i].strip():
-            i += 1
-        if i >= n:
-            break
-
-        if looks_like_values_line(lines[i]):
-            model, input_count, cleaned_count, transferred, issue_percentage = split5(lines[i])
-
-            # infer Table from first following data row
-            table_val = ""
-            k = i + 1
-            while k < n:
-                s = lines[k].strip()
-                k += 1
-                if not s:
-                    continue
-                if s.lower().startswith("pointid|table|field|error"):
-                    continue
-                if looks_like_values_line(s) or is_summary_header(s):
-                    # next block encountered; no data rows here
-                    k -= 1
-                    break
-                pid, tbl, fld, _ = split_point_row(s)
-                if pid.lower() == "pointid":
-                    continue
-                table_val = tbl
-                break
-
-            out_rows.append({
-                "model": model,
-                "Table": table_val,
-                "input_count": input_count,
-                "cleaned_count": cleaned_count,
-                "transferred": transferred,
-                "issue_percentage": issue_percentage,
-            })
-
-            i = k
-        else:
-            i += 1
-
-    return out_rows
+    sink = BlockSummarySink()
+    try:
+        run_transfer_metrics_pass(path, [sink])
+    except ValueError:
+        pass  # summary lines without any detail header are still reported
+    return sink.rows
 
 def write_block_summary(service, spreadsheet_id: str, sheet_name: str, rows: list):
     """
@@ -177,28 +86,13 @@ def write_block_summary(service, spreadsheet_id: str, sheet_name: str, rows: lis
     """
     headers = ["model", "Table", "input_count", "cleaned_count", "transferred", "issue_percentage"]
     values = [headers] + [[r.get(h, "") for h in headers] for r in rows]
-    end_row = len(values)  # header + data
-    a1 = f"'{sheet_name}'!A2:F{end_row}"
-
-    # Clear target area so old rows don't linger
-    service.spreadsheets().values().clear(
-        spreadsheetId=spreadsheet_id,
-        range=f"'{sheet_name}'!A:F"
-    ).execute()
-
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"'{SHEET_NAME}'!A2",  # <-- just the top-left cell
-        valueInputOption="RAW",
-        body={"values": values}  # 6 columns wide
-    ).execute()
-
-    # service.spreadsheets().values().update(
-    #     spreadsheetId=spreadsheet_id,
-    #     range=a1,
-    #     valueInputOption="RAW",
-    #     body={"values": values}
-    # ).execute()
+
+    # Clear target area so old rows don't linger, then write from A2;
+    # both go out in one flush (batchClear + batchUpdate)
+    writer = SheetsBatchWriter(service, spreadsheet_id)
+    writer.clear(f"'{sheet_name}'!A:F")
+    writer.write(f"'{sheet_name}'!A2", values)  # <-- just the top-left cell; 6 columns wide
+    writer.flush()
 
 def main():
     rows = parse_transfer_metrics_blocks(Path(TRANSFER_METRICS_PATH))
@@ -1,8 +1,11 @@
 from __future__ import print_function
+import csv
 import os
 from googleapiclient.discovery import build
 from google.oauth2.service_account import Credentials
 
+from sheets_batch import SheetsBatchWriter
+
 # --- CONFIGURATION ---
 SPREADSHEET_ID = "1iQzeKqRWHIKbnNptH_wRQEpJ_pt1rI00ax9d5BhDAhU"
 SOURCE_SHEET = "Copy of AMP_review"  # where we copy FROM
@@ -19,6 +22,9 @@ SERVICE_ACCOUNT_FILE = "transfermetrics_service_account.json"
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
+# Every changed cell (row, key, column, old, new) is written here instead of the console
+DIFF_SUMMARY_FILE = "amp_review_update_diff.csv"
+
 
 def col_index_to_a1(col_index_0_based):
     """
@@ -65,6 +71,28 @@ def build_header_index_map(header_row):
     return {name: idx for idx, name in enumerate(header_row)}
 
 
+def coalesce_rows(changed_rows):
+    """
+    Group (row_number, span_values) pairs, sorted by row, into runs of
+    consecutive rows: [(first_row, [span_values, ...]), ...].
+    """
+    runs = []
+    for row_number, span_values in changed_rows:
+        if runs and runs[-1][0] + len(runs[-1][1]) == row_number:
+            runs[-1][1].append(span_values)
+        else:
+            runs.append((row_number, [span_values]))
+    return runs
+
+
+def write_diff_summary(path, cell_changes):
+    """One CSV line per changed cell: Row, the MATCH_COLS key, Column, Old, New."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Row"] + MATCH_COLS + ["Column", "Old", "New"])
+        writer.writerows(cell_changes)
+
+
 def main():
     service = get_service()
 
@@ -107,10 +135,10 @@ def main():
     print(f"Built source lookup with {len(source_lookup)} unique keys.")
 
     # --- Prepare batch update for TARGET SHEET ---
-    data_updates = []
+    changed_rows = []   # (row number, values for the COPY_COLS span)
+    cell_changes = []   # diff summary lines
+    changed_by_col = {c: 0 for c in COPY_COLS}
     matched_count = 0
-    updated_rows_count = 0
-    updated_keys = []
 
     # Precompute min/max col indices for the span we’ll write per row
     copy_col_indices = [target_header_map[c] for c in COPY_COLS]
@@ -125,10 +153,6 @@ def main():
         if key in source_lookup:
             matched_count += 1
             src_vals = source_lookup[key]
-
-            # Capture old & new values for the COPY_COLS
-            old_vals = {}
-            new_vals = {}
             changed = False
 
             for col_name in COPY_COLS:
@@ -136,67 +160,44 @@ def main():
                 current_val = row_extended[col_idx]
                 new_val = src_vals[col_name]
 
-                old_vals[col_name] = current_val
-                new_vals[col_name] = new_val
-
                 if current_val != new_val:
                     changed = True
                     row_extended[col_idx] = new_val  # update in memory
+                    changed_by_col[col_name] += 1
+                    cell_changes.append([i, *key, col_name, current_val, new_val])
 
             if changed:
-                updated_rows_count += 1
-                updated_keys.append(key)
-
-                # Build the range for the span of columns from min_copy_idx to max_copy_idx
-                start_col_letter = col_index_to_a1(min_copy_idx)
-                end_col_letter = col_index_to_a1(max_copy_idx)
-                cell_range = f"'{TARGET_SHEET}'!{start_col_letter}{i}:{end_col_letter}{i}"
-
-                # Values for that entire span (we preserve intermediate columns)
-                span_values = row_extended[min_copy_idx : max_copy_idx + 1]
-
-                data_updates.append(
-                    {
-                        "range": cell_range,
-                        "values": [span_values],
-                    }
-                )
-
-                # Log details for this row
-                print(f"\nUpdating row {i} (key={key}):")
-                print("  Old values:")
-                for c in COPY_COLS:
-                    print(f"    {c}: {old_vals[c]!r}")
-                print("  New values:")
-                for c in COPY_COLS:
-                    print(f"    {c}: {new_vals[c]!r}")
+                # Values for the entire span (we preserve intermediate columns)
+                changed_rows.append((i, row_extended[min_copy_idx : max_copy_idx + 1]))
 
     print(f"\nTotal matches found: {matched_count}")
-    print(f"Rows with changes to apply: {updated_rows_count}")
+    print(f"Rows with changes to apply: {len(changed_rows)}")
 
     # --- Execute batch update ---
-    if not data_updates:
+    if not changed_rows:
         print("No matching rows with changes. Nothing to update.")
         return
 
-    body = {
-        "valueInputOption": "USER_ENTERED",
-        "data": data_updates,
-    }
-
-    result = (
-        service.spreadsheets()
-        .values()
-        .batchUpdate(
-            spreadsheetId=SPREADSHEET_ID,
-            body=body,
-        )
-        .execute()
+    write_diff_summary(DIFF_SUMMARY_FILE, cell_changes)
+    print(f"Changed cells by column (details in {DIFF_SUMMARY_FILE}):")
+    for col_name, n in changed_by_col.items():
+        print(f"  {col_name}: {n}")
+
+    # Consecutive changed rows go out as one multi-row range; the writer
+    # splits the batchUpdate into calls under its payload limit
+    start_col_letter = col_index_to_a1(min_copy_idx)
+    runs = coalesce_rows(changed_rows)
+    writer = SheetsBatchWriter(service, SPREADSHEET_ID, value_input_option="USER_ENTERED")
+    for first_row, span_rows in runs:
+        writer.write(f"'{TARGET_SHEET}'!{start_col_letter}{first_row}", span_rows)
+    calls = writer.flush()
+
+    total_cells = len(changed_rows) * (max_copy_idx - min_copy_idx + 1)
+    print(
+        f"\nUpdate complete. {total_cells} cells updated across {len(changed_rows)} rows "
+        f"in {len(runs)} range(s), {calls['values.batchUpdate']} batchUpdate call(s)."
     )
 
-    total_cells = sum(len(r["values"]) * len(r["values"][0]) for r in data_updates)
-    print(f"\nUpdate complete. {total_cells} cells updated across {updated_rows_count} rows.")
-
 
 if __name__ == "__main__":
     main()